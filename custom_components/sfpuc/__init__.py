@@ -17,14 +17,22 @@ License: MIT
 
 import logging
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+import aiohttp
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
 import voluptuous as vol
 
-from .const import DOMAIN
+from .const import (
+    DATA_CONNECTOR,
+    DATA_CONNECTOR_STOP,
+    DOMAIN,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+)
 from .coordinator import SFWaterCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -57,11 +65,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up San Francisco Water Power Sewer from a config entry.
 
     Initializes the integration by:
-    1. Creating a SFWaterCoordinator for data management
-    2. Performing the first data refresh
-    3. Storing the coordinator in the config entry
-    4. Setting up the sensor platform
-    5. Registering repairs flow for credential issues
+    1. Creating the shared HTTP connector (once for all entries)
+    2. Creating a SFWaterCoordinator for data management
+    3. Performing the first data refresh
+    4. Storing the coordinator in the config entry
+    5. Setting up the sensor platform
+    6. Registering repairs flow for credential issues
 
     Args:
         hass: Home Assistant instance.
@@ -71,13 +80,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         True if setup was successful, False otherwise.
     """
     _LOGGER.info("Setting up San Francisco Water Power Sewer integration")
-    _LOGGER.debug(
-        "Config entry data: %s",
-        {
-            k: "***" if k in ["username", "password"] else v
-            for k, v in entry.data.items()
-        },
-    )
+    # Only build the redacted copy of the entry data when it will be logged
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug(
+            "Config entry data: %s",
+            {
+                k: "***" if k in ["username", "password"] else v
+                for k, v in entry.data.items()
+            },
+        )
+
+    # Share one pooled connector across all SFPUC accounts so keep-alive
+    # connections survive between updates instead of paying for DNS and TLS
+    # on every poll
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_CONNECTOR not in domain_data:
+        connector = domain_data[DATA_CONNECTOR] = aiohttp.TCPConnector(
+            limit=4, keepalive_timeout=75, ttl_dns_cache=600
+        )
+
+        async def _async_close_connector(event: Event) -> None:
+            """Close the shared connector when Home Assistant stops."""
+            await connector.close()
+
+        # Entries are not unloaded on shutdown, so close it on stop as well
+        domain_data[DATA_CONNECTOR_STOP] = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, _async_close_connector
+        )
 
     # Create coordinator for managing updates
     _LOGGER.debug("Creating SFWaterCoordinator")
@@ -107,7 +136,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry.
 
     Cleans up the integration by unloading all platforms (sensor)
-    and removing the coordinator.
+    and removing the coordinator. The shared HTTP connector is closed
+    once the last SFPUC entry is unloaded, or when Home Assistant stops.
 
     Args:
         hass: Home Assistant instance.
@@ -116,4 +146,30 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     Returns:
         True if unload was successful, False otherwise.
     """
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+
+    if unload_ok and not any(
+        other.entry_id != entry.entry_id and other.state is ConfigEntryState.LOADED
+        for other in hass.config_entries.async_entries(DOMAIN)
+    ):
+        domain_data = hass.data.get(DOMAIN, {})
+        remove_stop_listener = domain_data.pop(DATA_CONNECTOR_STOP, None)
+        if remove_stop_listener is not None:
+            remove_stop_listener()
+        connector = domain_data.pop(DATA_CONNECTOR, None)
+        if connector is not None:
+            await connector.close()
+
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the state persisted for a deleted config entry.
+
+    Args:
+        hass: Home Assistant instance.
+        entry: The config entry being removed.
+    """
+    await Store(
+        hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry.entry_id)
+    ).async_remove()
@@ -4,15 +4,58 @@ import asyncio
 import logging
 from typing import Any
 
+import aiohttp
 from homeassistant import config_entries
 from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.core import HomeAssistant
 import voluptuous as vol
 
-from .const import CONF_PASSWORD, CONF_USERNAME, DOMAIN
+from .const import CONF_PASSWORD, CONF_USERNAME, DATA_CONNECTOR, DOMAIN
 from .scraper import SFPUCScraper
 
 _LOGGER = logging.getLogger(__name__)
 
+# Upper bound for validating credentials so a slow portal can't stall the flow
+LOGIN_TIMEOUT = 15  # seconds
+
+# Credentials form of the user step
+_CREDENTIALS_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_USERNAME): str,
+        vol.Required(CONF_PASSWORD): str,
+    }
+)
+
+
+async def _async_validate_login(
+    hass: HomeAssistant, username: str, password: str
+) -> bool:
+    """Attempt a login with a throwaway scraper, bounded by LOGIN_TIMEOUT.
+
+    The scraper gets its own session (and cookie jar) per attempt, but
+    borrows the shared connector once an entry is loaded (options flow,
+    additional accounts), so validation reuses pooled TLS connections.
+
+    Args:
+        hass: Home Assistant instance.
+        username: SFPUC account username/account number.
+        password: SFPUC account password.
+
+    Returns:
+        True if the credentials were accepted, False otherwise.
+
+    Raises:
+        TimeoutError: If the portal did not answer within LOGIN_TIMEOUT.
+    """
+    connector = hass.data.get(DOMAIN, {}).get(DATA_CONNECTOR)
+    scraper = SFPUCScraper(username, password, connector)
+    _LOGGER.debug("Created scraper instance, attempting login...")
+    try:
+        async with asyncio.timeout(LOGIN_TIMEOUT):
+            return await scraper.login()
+    finally:
+        await scraper.async_close()
+
 
 class ConfigFlowHandler(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for San Francisco Water Power Sewer.
@@ -42,23 +85,22 @@ class ConfigFlowHandler(ConfigFlow, domain=DOMAIN):
         errors = {}
 
         if user_input is not None:
+            # Redacted once for every log line of this attempt
+            redacted = user_input[CONF_USERNAME][:3] + "***"
             _LOGGER.debug(
                 "Attempting to validate SFPUC credentials for user: %s",
-                user_input[CONF_USERNAME][:3] + "***",
+                redacted,
             )
             try:
-                # Validate credentials by attempting login (run in executor to avoid blocking)
-                scraper = SFPUCScraper(
-                    user_input[CONF_USERNAME], user_input[CONF_PASSWORD]
+                # Validate credentials by attempting login
+                login_success = await _async_validate_login(
+                    self.hass, user_input[CONF_USERNAME], user_input[CONF_PASSWORD]
                 )
-                _LOGGER.debug("Created scraper instance, attempting login...")
-                loop = asyncio.get_event_loop()
-                login_success = await loop.run_in_executor(None, scraper.login)
 
                 if login_success:
                     _LOGGER.info(
                         "Successfully validated SFPUC credentials for user: %s",
-                        user_input[CONF_USERNAME][:3] + "***",
+                        redacted,
                     )
                     return self.async_create_entry(
                         title="San Francisco Water Power Sewer",
@@ -70,21 +112,21 @@ class ConfigFlowHandler(ConfigFlow, domain=DOMAIN):
                 else:
                     _LOGGER.warning(
                         "SFPUC login failed for user: %s",
-                        user_input[CONF_USERNAME][:3] + "***",
+                        redacted,
                     )
                     errors["base"] = "invalid_auth"
-            except Exception as e:
-                _LOGGER.error("Error during config flow validation: %s", e)
+            except TimeoutError:
+                _LOGGER.warning("Timed out validating SFPUC credentials")
+                errors["base"] = "timeout"
+            except aiohttp.ClientError as e:
+                # The scraper reports failed requests itself; this only sees
+                # errors from setting up or closing the HTTP session
+                _LOGGER.warning("SFPUC validation failed: %s", e)
                 errors["base"] = "unknown"
 
         return self.async_show_form(
             step_id="user",
-            data_schema=vol.Schema(
-                {
-                    vol.Required(CONF_USERNAME): str,
-                    vol.Required(CONF_PASSWORD): str,
-                }
-            ),
+            data_schema=_CREDENTIALS_SCHEMA,
             errors=errors,
         )
 
@@ -127,26 +169,33 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             a created options entry.
         """
         if user_input is not None:
+            current = self.config_entry.data
+            if (user_input[CONF_USERNAME], user_input[CONF_PASSWORD]) == (
+                current.get(CONF_USERNAME),
+                current.get(CONF_PASSWORD),
+            ):
+                # Nothing changed, the stored credentials need no new login
+                return self.async_create_entry(title="", data={})
+
             # Validate new credentials
             errors = {}
+            # Redacted once for every log line of this attempt
+            redacted = user_input[CONF_USERNAME][:3] + "***"
             try:
                 _LOGGER.debug(
                     "Attempting to validate new SFPUC credentials for user: %s",
-                    user_input[CONF_USERNAME][:3] + "***",
+                    redacted,
                 )
 
                 # Validate credentials by attempting login
-                scraper = SFPUCScraper(
-                    user_input[CONF_USERNAME], user_input[CONF_PASSWORD]
+                login_success = await _async_validate_login(
+                    self.hass, user_input[CONF_USERNAME], user_input[CONF_PASSWORD]
                 )
-                _LOGGER.debug("Created scraper instance, attempting login...")
-                loop = asyncio.get_event_loop()
-                login_success = await loop.run_in_executor(None, scraper.login)
 
                 if login_success:
                     _LOGGER.info(
                         "Successfully validated new SFPUC credentials for user: %s",
-                        user_input[CONF_USERNAME][:3] + "***",
+                        redacted,
                     )
                     # Update the config entry data with new credentials
                     self.hass.config_entries.async_update_entry(
@@ -160,11 +209,14 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 else:
                     _LOGGER.warning(
                         "SFPUC login failed for user: %s",
-                        user_input[CONF_USERNAME][:3] + "***",
+                        redacted,
                     )
                     errors["base"] = "invalid_auth"
-            except Exception as e:
-                _LOGGER.error("Error during options flow validation: %s", e)
+            except TimeoutError:
+                _LOGGER.warning("Timed out validating new SFPUC credentials")
+                errors["base"] = "timeout"
+            except aiohttp.ClientError as e:
+                _LOGGER.warning("SFPUC validation failed: %s", e)
                 errors["base"] = "unknown"
 
             if errors:
@@ -183,7 +235,8 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         """Get the options schema.
 
         Returns a Voluptuous schema for the options form, with the current
-        username pre-filled as the default value.
+        username pre-filled as the default value, so a cleared field keeps
+        the stored username.
 
         Returns:
             Voluptuous Schema for credential input.
@@ -1,7 +1,17 @@
 """Constants for the San Francisco Water Power Sewer integration."""
 
+from types import MappingProxyType
+
 DOMAIN = "sfpuc"
 
+# hass.data keys
+DATA_CONNECTOR = "connector"
+DATA_CONNECTOR_STOP = "connector_stop"
+
+# Per-entry coordinator state kept across restarts
+STORAGE_KEY = DOMAIN + ".{entry_id}"
+STORAGE_VERSION = 1
+
 # Configuration options
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"  # nosec B105
@@ -13,12 +23,17 @@ DEFAULT_UPDATE_INTERVAL = 720  # minutes (12 hours - fixed for daily data)
 KEY_DAILY_USAGE = "daily_usage"
 KEY_LAST_UPDATED = "last_updated"
 
-# Sensor types configuration
-SENSOR_TYPES = {
-    "daily_usage": {
-        "name": "Daily Water Usage",
-        "unit": "gal",
-        "icon": "mdi:water",
-        "device_class": "water",
-    },
-}
+# Sensor types configuration (read-only; the sensor platform itself is
+# described by the frozen entity descriptions in sensor.py)
+SENSOR_TYPES = MappingProxyType(
+    {
+        "daily_usage": MappingProxyType(
+            {
+                "name": "Daily Water Usage",
+                "unit": "gal",
+                "icon": "mdi:water",
+                "device_class": "water",
+            }
+        ),
+    }
+)
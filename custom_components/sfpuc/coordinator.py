@@ -3,16 +3,32 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Callable
 from datetime import datetime, timedelta
 import logging
+import math
 from typing import Any
 
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import (
+    get_last_statistics,
+    statistics_during_period,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
 
-from .const import CONF_PASSWORD, CONF_USERNAME, DEFAULT_UPDATE_INTERVAL, DOMAIN
+from .const import (
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    DATA_CONNECTOR,
+    DEFAULT_UPDATE_INTERVAL,
+    DOMAIN,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+)
 from .data_fetcher import (
     async_backfill_missing_data,
     async_background_historical_fetch,
@@ -23,6 +39,20 @@ from .utils import async_detect_billing_day, calculate_billing_period
 
 _LOGGER = logging.getLogger(__name__)
 
+# Seconds to batch persisted state writes
+_STORE_SAVE_DELAY = 10
+
+# Seconds to wait for the billing period statistics before keeping the last
+# value; the recorder executor may be busy with a large statistics write
+_STATISTICS_QUERY_TIMEOUT = 5
+
+
+def _statistic_id(username: str) -> str:
+    """Return the recorder statistic ID of an SFPUC account."""
+    # Sanitize account number (lowercase, "-" and " " to "_")
+    safe_account = username.lower().replace("-", "_").replace(" ", "_")
+    return f"{DOMAIN}:{safe_account}_water_consumption"
+
 
 class SFWaterCoordinator(DataUpdateCoordinator[dict[str, Any]]):
     """San Francisco Water Power Sewer data update coordinator.
@@ -53,6 +83,10 @@ class SFWaterCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             update_interval=timedelta(minutes=DEFAULT_UPDATE_INTERVAL),
         )
 
+        # Set when the sensor-only billing calculation was skipped because no
+        # entity was listening; the next entity to subscribe triggers a refresh
+        self._sensor_update_skipped = False
+
         # Add dummy listener to ensure coordinator updates continue
         # even when all sensors are disabled
         @callback
@@ -64,14 +98,51 @@ class SFWaterCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         self.logger.debug("Registered dummy listener to maintain statistics updates")
 
         self.config_entry = config_entry
+        # Shared connector set up in async_setup_entry (None outside of setup)
+        self._connector = hass.data.get(DOMAIN, {}).get(DATA_CONNECTOR)
         self.scraper = SFPUCScraper(
             config_entry.data[CONF_USERNAME],
             config_entry.data[CONF_PASSWORD],
+            self._connector,
         )
+        # Recorder statistic ID shared by all resolutions, derived from the
+        # account once instead of on every query
+        self._stat_id = _statistic_id(config_entry.data[CONF_USERNAME])
+        # When the last backfill ran; persisted so a restart shortly after one
+        # doesn't scrape the same days again
         self._last_backfill_date: datetime | None = None
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=config_entry.entry_id)
+        )
         self._historical_data_fetched = False
         self._checked_for_historical_data = False
         self._billing_day: int | None = None  # Detected billing day from monthly data
+        # Last (timestamp, usage) rows written per resolution, to skip
+        # re-inserting identical statistics on the next poll
+        self._last_inserted_statistics: dict[
+            str, tuple[tuple[datetime, float], ...]
+        ] = {}
+        # Bumped by the statistics handler whenever it adds statistics
+        self._statistics_version = 0
+        # Billing period total reused while no statistics were added:
+        # (bill_start, statistics version, usage)
+        self._bill_usage_cache: tuple[datetime, int, float] | None = None
+        # Statistics version seen by the last billing period query
+        self._bill_usage_version = 0
+
+    async def _async_setup(self) -> None:
+        """Restore the state persisted by a previous run."""
+        stored = await self._store.async_load()
+        if stored and (last_backfill := stored.get("last_backfill")):
+            self._last_backfill_date = datetime.fromisoformat(last_backfill)
+
+    @callback
+    def _async_record_backfill(self, when: datetime) -> None:
+        """Remember when the last backfill ran, across restarts too."""
+        self._last_backfill_date = when
+        self._store.async_delay_save(
+            lambda: {"last_backfill": when.isoformat()}, _STORE_SAVE_DELAY
+        )
 
     def update_credentials(self, username: str, password: str) -> None:
         """Update the scraper credentials.
@@ -83,16 +154,40 @@ class SFWaterCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         self.logger.info(
             "Updating SFPUC credentials for user: %s", username[:3] + "***"
         )
-        self.scraper = SFPUCScraper(username, password)
+        self.hass.async_create_task(self.scraper.async_close())
+        self.scraper = SFPUCScraper(username, password, self._connector)
+        self._stat_id = _statistic_id(username)
+
+    @property
+    def _has_entity_listeners(self) -> bool:
+        """Return True if an entity, not just the dummy listener, is subscribed."""
+        return len(self._listeners) > 1
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for data updates, refreshing if the sensor data was skipped."""
+        remove_listener = super().async_add_listener(update_callback, context)
+        if self._sensor_update_skipped:
+            self._sensor_update_skipped = False
+            self.hass.async_create_task(self.async_request_refresh())
+        return remove_listener
+
+    async def async_shutdown(self) -> None:
+        """Cancel any scheduled refresh and close the scraper session."""
+        await super().async_shutdown()
+        await self.scraper.async_close()
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Fetch data from SF PUC.
 
         This method:
-        1. Authenticates with the SFPUC portal
+        1. Authenticates with the SFPUC portal (reusing a valid session)
         2. Fetches historical data on first run
         3. Performs data backfilling for the past 30 days
-        4. Calculates current billing period usage (from 25th to today)
+        4. Calculates current billing period usage (from 25th to today),
+           unless no entity is subscribed to the coordinator
         5. Inserts statistics into Home Assistant recorder
         6. Returns current billing period usage for the sensor
 
@@ -104,13 +199,17 @@ class SFWaterCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         Raises:
             UpdateFailed: If authentication fails or data retrieval encounters errors.
         """
+        # Single reference time for the whole update, so a cycle that spans
+        # midnight doesn't mix two different "today"s
+        now = dt_util.now()
+
         try:
             self.logger.debug("Starting data update cycle")
 
-            # Login (run in executor since it's blocking)
-            loop = asyncio.get_event_loop()
-            self.logger.debug("Attempting SFPUC login")
-            login_success = await loop.run_in_executor(None, self.scraper.login)
+            # The scraper reuses its authenticated session and only logs in
+            # again when the portal sends it back to the login page
+            self.logger.debug("Ensuring SFPUC session is authenticated")
+            login_success = await self.scraper.async_ensure_logged_in()
 
             if not login_success:
                 self.logger.error("Failed to login to SF PUC - aborting update")
@@ -148,9 +247,27 @@ class SFWaterCoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
             # Check if we need to fetch historical data
             # Only check once per HA session to avoid repeated database queries
+            probed_billing_day = False
             if not self._checked_for_historical_data:
-                has_historical = await async_check_has_historical_data(self)
+                # Both startup probes only read the recorder, so run the
+                # billing day detection alongside
+                has_historical, billing_day = await asyncio.gather(
+                    async_check_has_historical_data(self),
+                    async_detect_billing_day(self),
+                    return_exceptions=True,
+                )
                 self._checked_for_historical_data = True
+                probed_billing_day = True
+                if isinstance(billing_day, Exception):
+                    self.logger.warning(
+                        "Failed to detect billing day, will use default: %s",
+                        billing_day,
+                    )
+                if isinstance(has_historical, Exception):
+                    self.logger.warning(
+                        "Failed to check for historical data: %s", has_historical
+                    )
+                    has_historical = False
                 if has_historical:
                     self._historical_data_fetched = True
                     self.logger.info(
@@ -163,8 +280,10 @@ class SFWaterCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                 self.logger.info("Scheduling historical data fetch in background...")
                 asyncio.create_task(async_background_historical_fetch(self))
 
-            # Detect billing day from monthly data (if not already detected)
-            if self._billing_day is None:
+            # Detect billing day from monthly data (if not already detected).
+            # On a fresh install the monthly statistics only appear once the
+            # background history fetch has inserted them, so keep retrying
+            if self._billing_day is None and not probed_billing_day:
                 try:
                     await async_detect_billing_day(self)
                 except Exception as err:
@@ -182,72 +301,108 @@ class SFWaterCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                 )
 
             # Calculate billing period dates (SFPUC bills ~25th of each month)
-            bill_start, bill_end = calculate_billing_period(self)
+            bill_start, bill_end = calculate_billing_period(self, now)
             self.logger.debug(
                 "Current billing period: %s to %s",
                 bill_start.date(),
                 bill_end.date(),
             )
 
+            # The billing period total only feeds the sensor entity; when every
+            # entity is disabled keep the last value and skip the recorder query
+            if not self._has_entity_listeners and self.data is not None:
+                self.logger.debug(
+                    "No entities subscribed - skipping billing period usage calculation"
+                )
+                self._sensor_update_skipped = True
+                return self.data
+
             # Use statistics data to get current billing period usage
             # This provides real-time updates from already-inserted hourly/daily data
-            from homeassistant.components.recorder import get_instance
-            from homeassistant.components.recorder.statistics import (
-                statistics_during_period,
-            )
-
             self.logger.debug(
                 "Calculating current billing period usage from statistics (%s to %s)",
                 bill_start.date(),
-                datetime.now().date(),
+                now.date(),
             )
 
             # Get hourly statistics for the current billing period
-            safe_account = (
-                self.config_entry.data.get(CONF_USERNAME, "unknown")
-                .replace("-", "_")
-                .lower()
-            )
-            stat_id = f"{DOMAIN}:{safe_account}_water_consumption"
-
-            try:
-                # Fetch hourly statistics from bill_start to now
-                # We query with period="hour" since we store hourly granularity data
-                stats = await get_instance(self.hass).async_add_executor_job(
-                    statistics_during_period,
-                    self.hass,
-                    dt_util.as_utc(bill_start),
-                    dt_util.as_utc(datetime.now()),
-                    {stat_id},
-                    "hour",
-                    None,
-                    {"state"},
+            stat_id = self._stat_id
+
+            version = self._statistics_version
+            cached = self._bill_usage_cache
+            if cached is not None and cached[:2] == (bill_start, version):
+                # Nothing was added to the recorder since the last query
+                current_bill_usage = cached[2]
+                self.logger.debug(
+                    "No new statistics - reusing billing period usage %.2f gallons",
+                    current_bill_usage,
                 )
-
-                if stats and stat_id in stats:
-                    # Sum all hourly usage values in the billing period
-                    current_bill_usage = sum(
-                        float(stat.get("state", 0) or 0) for stat in stats[stat_id]
+            else:
+                try:
+                    # Fetch hourly statistics from bill_start to now
+                    # We query with period="hour" since we store hourly granularity data
+                    # Reads stay on the recorder executor, which owns the
+                    # database connections
+                    async with asyncio.timeout(_STATISTICS_QUERY_TIMEOUT):
+                        stats = await get_instance(self.hass).async_add_executor_job(
+                            statistics_during_period,
+                            self.hass,
+                            dt_util.as_utc(bill_start),
+                            dt_util.as_utc(now),
+                            {stat_id},
+                            "hour",
+                            None,
+                            {"state"},
+                        )
+
+                    if stats and stat_id in stats:
+                        # Sum all hourly usage values in the billing period
+                        # (fsum keeps a month of fractional readings from drifting)
+                        current_bill_usage = math.fsum(
+                            stat["state"] or 0.0 for stat in stats[stat_id]
+                        )
+                        self.logger.debug(
+                            "Calculated current billing period usage from statistics: %.2f gallons from %d hourly records",
+                            current_bill_usage,
+                            len(stats[stat_id]),
+                        )
+                    else:
+                        self.logger.warning(
+                            "No statistics found for current billing period"
+                        )
+                        current_bill_usage = 0
+
+                    # The recorder writes added statistics in the background, so a
+                    # query right after an insert may miss them; only cache totals
+                    # once a whole update has passed without new statistics
+                    if version == self._bill_usage_version:
+                        self._bill_usage_cache = (
+                            bill_start,
+                            version,
+                            current_bill_usage,
+                        )
+                    self._bill_usage_version = version
+
+                except TimeoutError:
+                    current_bill_usage = (
+                        self.data["current_bill_usage"] if self.data else 0
                     )
-                    self.logger.debug(
-                        "Calculated current billing period usage from statistics: %.2f gallons from %d hourly records",
+                    self.logger.warning(
+                        "Recorder did not answer within %d seconds, keeping "
+                        "billing period usage %.2f gallons",
+                        _STATISTICS_QUERY_TIMEOUT,
                         current_bill_usage,
-                        len(stats[stat_id]),
                     )
-                else:
-                    self.logger.warning(
-                        "No statistics found for current billing period"
+                except Exception as err:
+                    self.logger.error(
+                        "Failed to calculate usage from statistics: %s", err
                     )
                     current_bill_usage = 0
 
-            except Exception as err:
-                self.logger.error("Failed to calculate usage from statistics: %s", err)
-                current_bill_usage = 0
-
             # Return simplified data for the single sensor
             data = {
                 "current_bill_usage": current_bill_usage,
-                "last_updated": datetime.now(),
+                "last_updated": now,
             }
 
             self.logger.info(
@@ -279,18 +434,8 @@ class SFWaterCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         statistics system.
         """
         try:
-            from homeassistant.components.recorder import get_instance
-            from homeassistant.components.recorder.statistics import (
-                get_last_statistics,
-            )
-
             # Get our statistic ID
-            safe_account = (
-                self.config_entry.data.get(CONF_USERNAME, "unknown")
-                .replace("-", "_")
-                .lower()
-            )
-            stat_id = f"{DOMAIN}:{safe_account}_water_consumption"
+            stat_id = self._stat_id
 
             # Query for existing statistics - this registers our domain as managing
             # its own statistics, preventing the recorder from auto-creating them
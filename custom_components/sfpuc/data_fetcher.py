@@ -4,12 +4,20 @@ import asyncio
 from datetime import datetime, timedelta
 
 from homeassistant.components.recorder import get_instance
-from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.components.recorder.statistics import (
+    get_last_statistics,
+    statistics_during_period,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.start import async_at_started
 from homeassistant.util import dt as dt_util
 
-from .const import CONF_USERNAME, DOMAIN
 from .statistics_handler import async_insert_statistics
 
+# Daily export labels are "MM/DD" without a year, so a single export must
+# span less than a year for every label to map to one date
+_DAILY_WINDOW_DAYS = 364
+
 
 async def async_check_has_historical_data(coordinator) -> bool:
     """Check if we already have sufficient historical data in the database.
@@ -18,22 +26,19 @@ async def async_check_has_historical_data(coordinator) -> bool:
     This prevents re-fetching 2 years of data on every HA restart.
     """
     try:
-        # Check for daily statistics from 1 year ago
-        one_year_ago = datetime.now() - timedelta(days=365)
-        safe_account = (
-            coordinator.config_entry.data.get(CONF_USERNAME, "unknown")
-            .replace("-", "_")
-            .lower()
-        )
-        stat_id = f"{DOMAIN}:{safe_account}_water_consumption"
+        # Check for statistics from 1 year ago, rolled up per day: the monthly
+        # billing rows (~12 days) and the hourly month (~32 days) can't reach
+        # the threshold on their own, only the daily history can
+        one_year_ago = dt_util.utcnow() - timedelta(days=365)
+        stat_id = coordinator._stat_id
 
         stats = await get_instance(coordinator.hass).async_add_executor_job(
             statistics_during_period,
             coordinator.hass,
-            dt_util.as_utc(one_year_ago),
+            one_year_ago,
             None,  # end_time (None = now)
             {stat_id},
-            "hour",  # period
+            "day",  # period - one row per day that has any statistics
             None,  # units
             {"sum"},  # types
         )
@@ -41,7 +46,7 @@ async def async_check_has_historical_data(coordinator) -> bool:
         # If we have statistics going back at least 1 year, consider historical data fetched
         if stat_id in stats and len(stats[stat_id]) > 300:  # ~300 days minimum
             coordinator.logger.info(
-                "Found %d existing daily statistics records - skipping historical data fetch",
+                "Found %d days of existing statistics - skipping historical data fetch",
                 len(stats[stat_id]),
             )
             return True
@@ -54,6 +59,232 @@ async def async_check_has_historical_data(coordinator) -> bool:
         return False
 
 
+async def _async_fetch_hourly_days(coordinator, fetch_dates: list[datetime]) -> list:
+    """Fetch hourly data for each of the given days, one day at a time.
+
+    The portal serves one export per session at a time, so the days are
+    downloaded in turn, with a short pause in between to avoid overwhelming
+    the server. A day that keeps failing is logged and skipped.
+    """
+    all_hourly_data: list = []
+    for fetch_date in fetch_dates:
+        # Retry logic for network errors
+        max_retries = 3
+        hourly_chunk = None
+        for attempt in range(max_retries):
+            try:
+                # Fetch one day at a time for hourly data
+                hourly_chunk = await coordinator.scraper.get_usage_data(
+                    fetch_date,
+                    fetch_date,  # Same day for start and end
+                    "hourly",
+                )
+                break  # Success
+            except Exception as err:
+                if attempt < max_retries - 1:
+                    coordinator.logger.warning(
+                        "Failed to fetch hourly data for %s (attempt %d/%d): %s, retrying...",
+                        fetch_date.date(),
+                        attempt + 1,
+                        max_retries,
+                        err,
+                    )
+                    await asyncio.sleep(2**attempt)  # Exponential backoff
+                else:
+                    coordinator.logger.error(
+                        "Failed to fetch hourly data for %s after %d attempts: %s",
+                        fetch_date.date(),
+                        max_retries,
+                        err,
+                    )
+                    # Continue with the other days instead of stopping
+
+        if hourly_chunk:
+            all_hourly_data.extend(hourly_chunk)
+            coordinator.logger.debug(
+                "Fetched %d hourly data points for %s",
+                len(hourly_chunk),
+                fetch_date.date(),
+            )
+
+        # Small delay to avoid overwhelming the server
+        await asyncio.sleep(0.5)
+
+    return all_hourly_data
+
+
+async def _async_fetch_monthly_history(coordinator, end_date: datetime) -> list:
+    """Fetch monthly billed usage data - all available history."""
+    coordinator.logger.info("Fetching monthly billed usage data...")
+    try:
+        # SFPUC typically has 2+ years of billing history
+        start_date = end_date - timedelta(days=730)  # 2 years back
+        monthly_data = await coordinator.scraper.get_usage_data(
+            start_date, end_date, "monthly"
+        )
+        if not monthly_data:
+            coordinator.logger.warning("No monthly billing data retrieved")
+            return []
+        return monthly_data
+    except Exception as err:
+        coordinator.logger.warning("Failed to fetch monthly billing data: %s", err)
+        return []
+
+
+async def _async_fetch_daily_window(
+    coordinator, window_start: datetime, window_end: datetime, slack_days: int
+) -> list | None:
+    """Try to download a whole window of daily data in a single export.
+
+    Returns None when the export fails or does not reach (within
+    slack_days) both ends of the window, so the caller can fall back to
+    small chunks.
+    """
+    try:
+        window_data = await coordinator.scraper.get_usage_data(
+            window_start, window_end, "daily"
+        )
+    except Exception as err:
+        coordinator.logger.debug(
+            "Daily window %s to %s failed, falling back to chunks: %s",
+            window_start.date(),
+            window_end.date(),
+            err,
+        )
+        return None
+
+    if not window_data:
+        return None
+    timestamps = [item["timestamp"] for item in window_data]
+    slack = timedelta(days=slack_days)
+    if min(timestamps) > window_start + slack or max(timestamps) < window_end - slack:
+        # The portal capped the export; fetch this window in chunks instead
+        return None
+    return window_data
+
+
+async def _async_fetch_daily_chunks(
+    coordinator, range_start: datetime, range_end: datetime, chunk_days: int
+) -> list:
+    """Fetch daily data in small chunks, retrying each chunk on errors.
+
+    Raises the last error if a chunk keeps failing.
+    """
+    daily_data: list = []
+    current_start = range_start
+
+    while current_start < range_end:
+        chunk_end = min(current_start + timedelta(days=chunk_days), range_end)
+        coordinator.logger.debug(
+            "Fetching daily chunk from %s to %s",
+            current_start.date(),
+            chunk_end.date(),
+        )
+
+        # Retry logic for network errors
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                chunk_data = await coordinator.scraper.get_usage_data(
+                    current_start, chunk_end, "daily"
+                )
+                break  # Success, exit retry loop
+            except Exception as err:
+                if attempt < max_retries - 1:
+                    coordinator.logger.warning(
+                        "Failed to fetch daily chunk (attempt %d/%d): %s, retrying...",
+                        attempt + 1,
+                        max_retries,
+                        err,
+                    )
+                    await asyncio.sleep(2**attempt)  # Exponential backoff
+                else:
+                    coordinator.logger.error(
+                        "Failed to fetch daily chunk after %d attempts: %s",
+                        max_retries,
+                        err,
+                    )
+                    raise  # Re-raise to stop fetching
+
+        if chunk_data:
+            daily_data.extend(chunk_data)
+            coordinator.logger.debug("Chunk returned %d data points", len(chunk_data))
+
+        current_start = chunk_end + timedelta(days=1)
+        # Small delay to avoid overwhelming the server
+        await asyncio.sleep(1.0)
+
+    return daily_data
+
+
+async def _async_fetch_daily_history(coordinator, end_date_available: datetime) -> list:
+    """Fetch daily data for the past 2 years (comprehensive historical data).
+
+    Covers 2 years ago to 31 days ago (stops 1 day before hourly period for
+    continuity). Each year-long window is first requested as one export;
+    SFPUC has limited daily downloads to ~7-10 days, so a window that fails
+    or comes back short is fetched again in small chunks.
+    """
+    coordinator.logger.info("Fetching daily data (2 years to 31 days ago)...")
+    all_daily_data: list = []
+    try:
+        chunk_days = 3  # Fetch 3 days at a time when falling back to chunks
+        start_date_2yr = end_date_available - timedelta(
+            days=730
+        )  # 2 years back from last available
+        end_date_daily = end_date_available - timedelta(days=31)  # Stop 31 days ago
+        window_start = start_date_2yr
+
+        while window_start < end_date_daily:
+            window_end = min(
+                window_start + timedelta(days=_DAILY_WINDOW_DAYS), end_date_daily
+            )
+            window_data = await _async_fetch_daily_window(
+                coordinator, window_start, window_end, chunk_days
+            )
+            if window_data is None:
+                window_data = await _async_fetch_daily_chunks(
+                    coordinator, window_start, window_end, chunk_days
+                )
+            all_daily_data.extend(window_data)
+            window_start = window_end + timedelta(days=1)
+    except Exception as err:
+        coordinator.logger.warning("Failed to fetch daily data: %s", err)
+        return []
+
+    if not all_daily_data:
+        coordinator.logger.warning("No daily data retrieved")
+    return all_daily_data
+
+
+async def _async_fetch_hourly_history(coordinator, end_date: datetime) -> list:
+    """Fetch hourly data for the past 32 days (most detailed recent data).
+
+    This fills in the gap between daily data (ends 31 days ago) and most
+    recent available. Starts 32 days ago to create 1-day overlap with daily
+    data for seamless continuity, and stops 2 days before today due to SFPUC
+    data lag.
+    """
+    coordinator.logger.info("Fetching hourly data for last 32 days...")
+    try:
+        # Fetch from 32 days ago to 2 days ago (respecting SFPUC data lag)
+        # range(32, 1, -1) gives offsets 32..2, covering Oct 12 to Nov 11
+        all_hourly_data = await _async_fetch_hourly_days(
+            coordinator,
+            [
+                end_date - timedelta(days=days_offset)
+                for days_offset in range(32, 1, -1)
+            ],
+        )
+    except Exception as err:
+        coordinator.logger.warning("Failed to fetch hourly data: %s", err)
+        return []
+
+    if not all_hourly_data:
+        coordinator.logger.warning("No hourly data retrieved")
+    return all_hourly_data
+
+
 async def async_fetch_historical_data(coordinator) -> None:
     """Fetch historical data going back months/years on first run.
 
@@ -65,6 +296,10 @@ async def async_fetch_historical_data(coordinator) -> None:
     Monthly data represents actual billing periods (typically 25th-25th)
     and provides valuable year-over-year comparison data.
 
+    The three resolutions are downloaded and inserted one after the other:
+    the portal serves one export per session at a time, and inserting in
+    order builds the cumulative sum chronologically.
+
     Logs warnings if data retrieval fails but does not raise exceptions
     to avoid blocking the initial coordinator setup.
 
@@ -82,181 +317,24 @@ async def async_fetch_historical_data(coordinator) -> None:
         end_date = datetime.now()
         # SFPUC has ~2 day data lag - don't fetch today or yesterday
         end_date_available = end_date - timedelta(days=2)
-        loop = asyncio.get_event_loop()
-
-        # Fetch monthly billed usage data - all available history
-        coordinator.logger.info("Fetching monthly billed usage data...")
-        try:
-            # SFPUC typically has 2+ years of billing history
-            start_date = end_date - timedelta(days=730)  # 2 years back
-            monthly_data = await loop.run_in_executor(
-                None,
-                coordinator.scraper.get_usage_data,
-                start_date,
-                end_date,
-                "monthly",
-            )
-            if monthly_data:
-                await async_insert_statistics(coordinator, monthly_data)
-                coordinator.logger.info(
-                    "Fetched %d monthly billing data points", len(monthly_data)
-                )
-            else:
-                coordinator.logger.warning("No monthly billing data retrieved")
-        except Exception as err:
-            coordinator.logger.warning("Failed to fetch monthly billing data: %s", err)
-
-        # Fetch daily data for the past 2 years (comprehensive historical data)
-        # SFPUC limits daily data downloads to ~7-10 days, so we fetch in chunks
-        # Fetch from 2 years ago to 31 days ago (stops 1 day before hourly period for continuity)
-        coordinator.logger.info(
-            "Fetching daily data in chunks (2 years to 31 days ago)..."
-        )
-        try:
-            all_daily_data = []
-            chunk_days = 3  # Fetch 3 days at a time to reduce load
-            start_date_2yr = end_date_available - timedelta(
-                days=730
-            )  # 2 years back from last available
-            end_date_daily = end_date_available - timedelta(days=31)  # Stop 31 days ago
-            current_start = start_date_2yr
-
-            while current_start < end_date_daily:
-                chunk_end = min(
-                    current_start + timedelta(days=chunk_days), end_date_daily
-                )
-                coordinator.logger.debug(
-                    "Fetching daily chunk from %s to %s",
-                    current_start.date(),
-                    chunk_end.date(),
-                )
-
-                # Retry logic for network errors
-                max_retries = 3
-                for attempt in range(max_retries):
-                    try:
-                        chunk_data = await loop.run_in_executor(
-                            None,
-                            coordinator.scraper.get_usage_data,
-                            current_start,
-                            chunk_end,
-                            "daily",
-                        )
-                        break  # Success, exit retry loop
-                    except Exception as err:
-                        if attempt < max_retries - 1:
-                            coordinator.logger.warning(
-                                "Failed to fetch daily chunk (attempt %d/%d): %s, retrying...",
-                                attempt + 1,
-                                max_retries,
-                                err,
-                            )
-                            await asyncio.sleep(2**attempt)  # Exponential backoff
-                        else:
-                            coordinator.logger.error(
-                                "Failed to fetch daily chunk after %d attempts: %s",
-                                max_retries,
-                                err,
-                            )
-                            raise  # Re-raise to stop fetching
-
-                if chunk_data:
-                    all_daily_data.extend(chunk_data)
-                    coordinator.logger.debug(
-                        "Chunk returned %d data points", len(chunk_data)
-                    )
 
-                current_start = chunk_end + timedelta(days=1)
-                # Small delay to avoid overwhelming the server
-                await asyncio.sleep(1.0)
-
-            if all_daily_data:
-                await async_insert_statistics(coordinator, all_daily_data)
+        for fetch_history, history_end, resolution, description in (
+            (_async_fetch_monthly_history, end_date, "monthly", "monthly billing"),
+            (_async_fetch_daily_history, end_date_available, "daily", "daily"),
+            (_async_fetch_hourly_history, end_date, "hourly", "hourly"),
+        ):
+            data = await fetch_history(coordinator, history_end)
+            if not data:
+                continue
+            try:
+                await async_insert_statistics(coordinator, data, resolution)
                 coordinator.logger.info(
-                    "Fetched %d daily data points total", len(all_daily_data)
-                )
-            else:
-                coordinator.logger.warning("No daily data retrieved")
-        except Exception as err:
-            coordinator.logger.warning("Failed to fetch daily data: %s", err)
-
-        # Fetch hourly data for the past 32 days (most detailed recent data)
-        # This fills in the gap between daily data (ends 31 days ago) and most recent available
-        # Starts 32 days ago to create 1-day overlap with daily data for seamless continuity
-        # Fetches day-by-day to append after daily data in cumulative sum
-        # Stops 2 days before today due to SFPUC data lag
-        coordinator.logger.info("Fetching hourly data for last 32 days...")
-        try:
-            all_hourly_data = []
-            # Fetch from 32 days ago to 2 days ago (respecting SFPUC data lag)
-            # range(32, 1, -1) gives offsets 32..2, covering Oct 12 to Nov 11
-
-            for days_offset in range(
-                32,
-                1,
-                -1,  # Start from 32 days ago, stop at 2 days ago (inclusive of offset 2 = today-2)
-            ):  # Stop at 2 days ago (SFPUC data lag)
-                fetch_date = end_date - timedelta(days=days_offset)
-                coordinator.logger.debug(
-                    "Fetching hourly data for %s (offset %d days back)",
-                    fetch_date.date(),
-                    days_offset,
+                    "Fetched %d %s data points", len(data), description
                 )
-
-                # Retry logic for network errors
-                max_retries = 3
-                hourly_chunk = None
-                for attempt in range(max_retries):
-                    try:
-                        # Fetch one day at a time for hourly data
-                        hourly_chunk = await loop.run_in_executor(
-                            None,
-                            coordinator.scraper.get_usage_data,
-                            fetch_date,
-                            fetch_date,  # Same day for start and end
-                            "hourly",
-                        )
-                        break  # Success
-                    except Exception as err:
-                        if attempt < max_retries - 1:
-                            coordinator.logger.warning(
-                                "Failed to fetch hourly data for %s (attempt %d/%d): %s, retrying...",
-                                fetch_date.date(),
-                                attempt + 1,
-                                max_retries,
-                                err,
-                            )
-                            await asyncio.sleep(2**attempt)  # Exponential backoff
-                        else:
-                            coordinator.logger.error(
-                                "Failed to fetch hourly data for %s after %d attempts: %s",
-                                fetch_date.date(),
-                                max_retries,
-                                err,
-                            )
-                            # Continue to next day instead of stopping
-
-                if hourly_chunk:
-                    all_hourly_data.extend(hourly_chunk)
-                    coordinator.logger.debug(
-                        "Fetched %d hourly data points for %s",
-                        len(hourly_chunk),
-                        fetch_date.date(),
-                    )
-
-                # Small delay to avoid overwhelming the server
-                await asyncio.sleep(0.5)
-
-            if all_hourly_data:
-                await async_insert_statistics(coordinator, all_hourly_data)
-                coordinator.logger.info(
-                    "Fetched %d hourly data points total for past 32 days",
-                    len(all_hourly_data),
+            except Exception as err:
+                coordinator.logger.warning(
+                    "Failed to insert %s data: %s", description, err
                 )
-            else:
-                coordinator.logger.warning("No hourly data retrieved")
-        except Exception as err:
-            coordinator.logger.warning("Failed to fetch hourly data: %s", err)
 
     except Exception as err:
         coordinator.logger.warning("Failed to fetch historical data: %s", err)
@@ -266,18 +344,32 @@ async def async_background_historical_fetch(coordinator) -> None:
     """Fetch historical data in background after startup.
 
     This method runs the historical data fetch process in the background
-    to avoid blocking Home Assistant startup. It waits 30 seconds after
-    startup before beginning to allow HA to fully initialize.
+    to avoid blocking Home Assistant startup. It waits until Home Assistant
+    has fully started (immediately when it already has) before beginning.
     """
     try:
-        # Wait 30 seconds to let Home Assistant fully start
-        await asyncio.sleep(30)
+        # Wait for Home Assistant to finish starting rather than a fixed delay
+        started = asyncio.Event()
+
+        @callback
+        def _async_started(hass: HomeAssistant) -> None:
+            started.set()
+
+        unsub_started = async_at_started(coordinator.hass, _async_started)
+        # Drop the listener if the entry unloads before Home Assistant starts,
+        # so it never fires against an unloaded coordinator
+        coordinator.config_entry.async_on_unload(unsub_started)
+        try:
+            await started.wait()
+        finally:
+            # Also covers this task being cancelled while it waits
+            unsub_started()
 
         coordinator.logger.info("Starting background historical data fetch...")
         await async_fetch_historical_data(coordinator)
         coordinator._historical_data_fetched = True
         # Set backfill date to now to avoid re-fetching the same data
-        coordinator._last_backfill_date = datetime.now()
+        coordinator._async_record_backfill(datetime.now())
         coordinator.logger.info(
             "Background historical data fetch completed successfully"
         )
@@ -314,14 +406,7 @@ async def async_backfill_missing_data(coordinator) -> None:
         coordinator.logger.debug("Fetching new hourly data since last update...")
 
         # Get the latest statistic timestamp from database
-        from homeassistant.components.recorder.statistics import get_last_statistics
-
-        safe_account = (
-            coordinator.config_entry.data.get(CONF_USERNAME, "unknown")
-            .replace("-", "_")
-            .lower()
-        )
-        stat_id = f"{DOMAIN}:{safe_account}_water_consumption"
+        stat_id = coordinator._stat_id
 
         last_stat = await get_instance(coordinator.hass).async_add_executor_job(
             get_last_statistics, coordinator.hass, 1, stat_id, True, set()
@@ -331,12 +416,10 @@ async def async_backfill_missing_data(coordinator) -> None:
         if last_stat and stat_id in last_stat:
             last_timestamp = last_stat[stat_id][0]["start"]
             # Convert timestamp to datetime and add 1 hour to avoid duplicate
-            from datetime import datetime as dt
-
-            start_date = dt.fromtimestamp(last_timestamp) + timedelta(hours=1)
+            last_time = datetime.fromtimestamp(last_timestamp)
+            start_date = last_time + timedelta(hours=1)
             coordinator.logger.debug(
-                "Latest statistic: %s, fetching data since then",
-                dt.fromtimestamp(last_timestamp),
+                "Latest statistic: %s, fetching data since then", last_time
             )
         else:
             # No existing data - skip backfill on first sync
@@ -346,60 +429,21 @@ async def async_backfill_missing_data(coordinator) -> None:
             )
             return
 
-        loop = asyncio.get_event_loop()
-
         # Fetch only NEW hourly data since last statistic (up to 2 days ago)
         coordinator.logger.info(
             f"Fetching new hourly data from {start_date.date()} to {end_date_available.date()}..."
         )
         try:
             # Fetch hourly data from start_date to end_date_available, one day at a time
-            hourly_data_all = []
+            fetch_dates = []
             current_date = start_date
-
             while current_date.date() <= end_date_available.date():
-                fetch_date = current_date
-
-                # Retry logic for network errors
-                max_retries = 3
-                hourly_chunk = None
-                for attempt in range(max_retries):
-                    try:
-                        hourly_chunk = await loop.run_in_executor(
-                            None,
-                            coordinator.scraper.get_usage_data,
-                            fetch_date,
-                            fetch_date,  # Same day for start and end
-                            "hourly",
-                        )
-                        break  # Success
-                    except Exception as err:
-                        if attempt < max_retries - 1:
-                            coordinator.logger.warning(
-                                "Failed to fetch hourly data for %s (attempt %d/%d): %s, retrying...",
-                                fetch_date.date(),
-                                attempt + 1,
-                                max_retries,
-                                err,
-                            )
-                            await asyncio.sleep(2**attempt)
-                        else:
-                            coordinator.logger.error(
-                                "Failed to fetch hourly data for %s after %d attempts: %s",
-                                fetch_date.date(),
-                                max_retries,
-                                err,
-                            )
-
-                if hourly_chunk:
-                    hourly_data_all.extend(hourly_chunk)
-
-                # Move to next day
+                fetch_dates.append(current_date)
                 current_date += timedelta(days=1)
-                await asyncio.sleep(0.5)  # Small delay
+            hourly_data_all = await _async_fetch_hourly_days(coordinator, fetch_dates)
 
             if hourly_data_all:
-                await async_insert_statistics(coordinator, hourly_data_all)
+                await async_insert_statistics(coordinator, hourly_data_all, "hourly")
                 coordinator.logger.info(
                     "Fetched %d new hourly data points", len(hourly_data_all)
                 )
@@ -408,7 +452,7 @@ async def async_backfill_missing_data(coordinator) -> None:
         except Exception as err:
             coordinator.logger.warning("Failed to fetch new hourly data: %s", err)
 
-        coordinator._last_backfill_date = now
+        coordinator._async_record_backfill(now)
 
     except Exception as err:
         coordinator.logger.warning("Failed to update with new data: %s", err)
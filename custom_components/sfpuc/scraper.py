@@ -1,15 +1,154 @@
 """SFPUC web scraper for water usage data."""
 
-from datetime import datetime
+import asyncio
+from collections.abc import Mapping
+from datetime import date, datetime, timedelta
+import html
 import logging
-import time
+import re
+from types import MappingProxyType
 from typing import Any, cast
+from urllib.parse import urljoin, urlsplit
 
-from bs4 import BeautifulSoup
-import requests
+import aiohttp
 
 _LOGGER = logging.getLogger(__name__)
 
+# Mimic a real browser
+_BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Language": "en-US,en;q=0.9",
+    "DNT": "1",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+# Hidden ASP.NET fields needed to submit the login form
+_HIDDEN_FIELD_RE = re.compile(
+    rb'<input[^>]*\bname="(__VIEWSTATE|__VIEWSTATEGENERATOR|__EVENTVALIDATION)"'
+    rb'[^>]*\bvalue="([^"]*)"',
+    re.IGNORECASE,
+)
+
+# Every <input> tag of a usage page, and the name/value attributes of one
+_INPUT_TAG_RE = re.compile(rb"<input\b[^>]*>", re.IGNORECASE)
+_NAME_ATTR_RE = re.compile(rb'\sname="([^"]*)"', re.IGNORECASE)
+_VALUE_ATTR_RE = re.compile(rb'\svalue="([^"]*)"', re.IGNORECASE)
+
+# Text on the page after signing in, and error text on a rejected sign-in
+_LOGIN_SUCCESS_RE = re.compile(rb"Welcome|Dashboard|Account|Usage|Logout")
+_LOGIN_FAILURE_RE = re.compile(rb"Login failed|Authentication failed|Please try again")
+
+# Usage page and export type for each supported resolution
+_USAGE_PAGES = MappingProxyType(
+    {
+        "hourly": ("USE_HOURLY.aspx", "Hourly+Use"),
+        "daily": ("USE_DAILY.aspx", "Daily+Use"),
+        # Monthly data comes from the billed usage page
+        "monthly": ("USE_BILLED.aspx", "Billed+Use"),
+    }
+)
+
+# Month numbers for the "Mon YY" labels of the billed usage export
+_MONTH_NUMBERS = MappingProxyType(
+    {
+        name: number
+        for number, name in enumerate(
+            "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split(), start=1
+        )
+    }
+)
+
+# Excel download parameters that never change between requests
+_STATIC_DOWNLOAD_PARAMS = MappingProxyType(
+    {
+        "img_EXCEL_DOWNLOAD_IMAGE.x": "8",
+        "img_EXCEL_DOWNLOAD_IMAGE.y": "13",
+        "dl_UOM": "GALLONS",
+    }
+)
+
+# Transient server errors worth retrying, and the base delay between tries
+_RETRY_STATUSES = frozenset({500, 502, 503, 504})
+_RETRY_BACKOFF = 0.3
+
+# Number of downloaded exports remembered for conditional re-requests
+_EXPORT_CACHE_SIZE = 32
+
+# How far outside the requested range a daily export row may fall and still
+# be dated; the portal sometimes returns a few days around the edges
+_DAILY_LABEL_SLACK = timedelta(days=7)
+
+
+def _parse_hourly_timestamp(
+    text: str, start_date: datetime, end_date: datetime
+) -> datetime:
+    """Parse an hourly export label such as "12 AM" or "1 PM"."""
+    hour_str, am_pm = text.split()
+    am_pm = am_pm.upper()
+    hour = int(hour_str)
+    if am_pm == "PM" and hour != 12:
+        hour += 12
+    elif am_pm == "AM" and hour == 12:
+        hour = 0
+    # Use the requested end_date for hourly data
+    # SFPUC typically shows hourly data up to 2 days ago
+    return datetime(end_date.year, end_date.month, end_date.day, hour)
+
+
+def _parse_daily_timestamp(
+    text: str, start_date: datetime, end_date: datetime
+) -> datetime:
+    """Parse a daily export label "MM/DD", which carries no year.
+
+    The year is the one that puts the date inside the requested range, or
+    failing that closest to it within _DAILY_LABEL_SLACK. A label that fits
+    no year raises ValueError, so the row is dropped rather than misdated.
+    """
+    month, day = map(int, text.split("/"))
+    start, end = start_date.date(), end_date.date()
+    nearest: tuple[timedelta, int] | None = None
+    for year in range(start.year - 1, end.year + 2):
+        try:
+            candidate = date(year, month, day)
+        except ValueError:
+            continue  # February 29 outside a leap year
+        if start <= candidate <= end:
+            return datetime(year, month, day)
+        distance = start - candidate if candidate < start else candidate - end
+        if distance <= _DAILY_LABEL_SLACK and (
+            nearest is None or distance < nearest[0]
+        ):
+            nearest = (distance, year)
+    if nearest is None:
+        raise ValueError(f"{text} is outside the requested range")
+    return datetime(nearest[1], month, day)
+
+
+def _parse_monthly_timestamp(
+    text: str, start_date: datetime, end_date: datetime
+) -> datetime:
+    """Parse a billed usage export label "Mon YY" (like "Dec 23")."""
+    month_name, year_str = text.split()
+    month = _MONTH_NUMBERS[month_name.title()]
+    year = 2000 + int(year_str)  # Convert 2-digit to 4-digit
+    return datetime(year, month, 1)
+
+
+# Timestamp parser for each resolution's export, looked up once per row
+# instead of walking an if/elif chain
+_TIMESTAMP_PARSERS = MappingProxyType(
+    {
+        "hourly": _parse_hourly_timestamp,
+        "daily": _parse_daily_timestamp,
+        "monthly": _parse_monthly_timestamp,
+    }
+)
+
+
+class _SessionExpiredError(Exception):
+    """Raised when the portal sends an authenticated request back to login."""
+
 
 class SFPUCScraper:
     """SF PUC water usage data scraper.
@@ -18,35 +157,137 @@ class SFPUCScraper:
     (San Francisco Public Utilities Commission) online portal at
     myaccount-water.sfpuc.org. It manages authentication, form submission,
     and parsing of downloaded usage data in various resolutions.
+
+    All network I/O is native asyncio, so callers must await the methods
+    directly rather than handing them to an executor. The remaining parsing
+    work is a few small pages per update; should it ever need offloading, use
+    Home Assistant's shared thread pool (hass.async_add_executor_job), never a
+    process pool.
     """
 
-    def __init__(self, username: str, password: str) -> None:
+    # One scraper lives per config entry (plus one per credential check), so
+    # skip the per-instance __dict__
+    __slots__ = (
+        "_connector",
+        "_export_cache",
+        "_export_lock",
+        "_form_tokens",
+        "_logged_in",
+        "_login_future",
+        "_masked_username",
+        "base_url",
+        "password",
+        "session",
+        "timeout",
+        "username",
+    )
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        connector: aiohttp.BaseConnector | None = None,
+    ) -> None:
         """Initialize the scraper.
 
+        The aiohttp session is created lazily on first use so the scraper
+        can be constructed outside of a running event loop.
+
         Args:
             username: SFPUC account username/account number.
             password: SFPUC account password.
+            connector: Optional shared connector whose pooled keep-alive
+                connections are reused. The scraper never closes it.
         """
         self.username = username
         self.password = password
-        self.session = requests.Session()
+        # Credentials are fixed for the scraper's lifetime (a credential change
+        # builds a new scraper), so mask the username for logging only once
+        self._masked_username = username[:3] + "***"
+        self.session: aiohttp.ClientSession | None = None
         self.base_url = "https://myaccount-water.sfpuc.org"
-        self.timeout = 30  # 30 second timeout for all requests
-
-        # Mimic a real browser
-        self.session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Accept-Encoding": "gzip, deflate, br",
-                "DNT": "1",
-                "Connection": "keep-alive",
-                "Upgrade-Insecure-Requests": "1",
-            }
-        )
+        # 30 second timeout for all requests, 10 of which may go to connecting
+        self.timeout = aiohttp.ClientTimeout(total=30, connect=10)
+        self._connector = connector
+        # Validators and parsed rows of recent exports, keyed by request, so
+        # unchanged exports can be answered with 304 Not Modified
+        self._export_cache: dict[
+            tuple[str, date, date], tuple[dict[str, str], list[dict[str, Any]]]
+        ] = {}
+        # Form tokens scraped from each usage page, keyed by resolution and
+        # reused until a postback is rejected or the session changes
+        self._form_tokens: dict[str, dict[str, str]] = {}
+        # The export URL carries no parameters, so the portal serves whatever
+        # the session's last postback asked for; one export at a time
+        self._export_lock = asyncio.Lock()
+        self._logged_in = False
+        # Result of the login currently in flight, shared by concurrent callers
+        self._login_future: asyncio.Future[bool] | None = None
+
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        """Return the HTTP session, creating it on first use.
+
+        The session keeps the ASP.NET authentication cookies between the
+        login and the data download requests, and is reused for the
+        scraper's lifetime; only async_close discards it.
+
+        Returns:
+            The aiohttp client session bound to the running event loop.
+        """
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=self._connector,
+                connector_owner=self._connector is None,
+                headers=_BROWSER_HEADERS,
+                timeout=self.timeout,
+            )
+        return self.session
+
+    async def async_close(self) -> None:
+        """Close the HTTP session if one was opened."""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        self._logged_in = False
+        self._form_tokens.clear()
+
+    @staticmethod
+    def _conditional_headers(headers: Mapping[str, str]) -> dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers from response validators."""
+        conditional = {}
+        if etag := headers.get("ETag"):
+            conditional["If-None-Match"] = etag
+        if last_modified := headers.get("Last-Modified"):
+            conditional["If-Modified-Since"] = last_modified
+        return conditional
+
+    def _is_login_page(self, status: int, url: str) -> bool:
+        """Return True if a response landed on the login page instead.
+
+        Forms authentication redirects to the site root with a ReturnUrl
+        query, so only the scheme, host and path are compared.
+        """
+        if status == 401:
+            return True
+        parts = urlsplit(url)
+        on_site = f"{parts.scheme}://{parts.netloc}" == self.base_url
+        return on_site and parts.path in ("", "/")
+
+    async def async_ensure_logged_in(self) -> bool:
+        """Log in only if the session is not already authenticated.
 
-    def login(self) -> bool:
+        The authentication cookie lives in the long-lived session, so a
+        successful login is reused until the portal sends us back to the
+        login page.
+
+        Returns:
+            True if the session is authenticated, False otherwise.
+        """
+        if self._logged_in:
+            return True
+        return await self.login()
+
+    async def login(self) -> bool:
         """Authenticate with SFPUC portal.
 
         Performs ASP.NET authentication with the SFPUC portal by:
@@ -54,9 +295,35 @@ class SFPUCScraper:
         2. Submitting credentials via POST with the extracted tokens
         3. Analyzing response for success/failure indicators
 
+        Concurrent callers share a single in-flight login instead of each
+        starting their own and invalidating each other's session cookie.
+
         Returns:
             True if login was successful, False otherwise.
         """
+        if self._login_future is not None:
+            _LOGGER.debug("Login already in progress, waiting for its result")
+            # Shield so a cancelled waiter can't cancel the shared result
+            return await asyncio.shield(self._login_future)
+
+        future = self._login_future = asyncio.get_running_loop().create_future()
+        # Tokens scraped under the previous session are not valid for the next
+        self._form_tokens.clear()
+        try:
+            self._logged_in = await self._async_login()
+        except BaseException:
+            # Waiters see a failed login rather than a cancellation or an
+            # error of their own, and are never left waiting on the future
+            future.set_result(False)
+            raise
+        else:
+            future.set_result(self._logged_in)
+        finally:
+            self._login_future = None
+        return self._logged_in
+
+    async def _async_login(self) -> bool:
+        """Run the login request sequence with retries."""
         max_retries = 3
         base_delay = 2  # seconds
 
@@ -70,31 +337,33 @@ class SFPUCScraper:
                         attempt + 1,
                         max_retries,
                     )
-                    time.sleep(delay)
+                    await asyncio.sleep(delay)
 
                 _LOGGER.debug(
                     "Starting SFPUC login process for user: %s (attempt %d/%d)",
-                    self.username[:3] + "***",
+                    self._masked_username,
                     attempt + 1,
                     max_retries,
                 )
 
+                session = await self._ensure_session()
+
                 # GET the login page to extract ViewState
                 login_url = f"{self.base_url}/"
                 _LOGGER.debug("Fetching login page: %s", login_url)
-                response = self.session.get(login_url, timeout=self.timeout)
-                _LOGGER.debug("Login page response status: %s", response.status_code)
-
-                soup = BeautifulSoup(response.content, "html.parser")
+                async with session.get(login_url) as response:
+                    _LOGGER.debug("Login page response status: %s", response.status)
+                    content = await response.read()
 
                 # Extract hidden form fields
-                viewstate = soup.find("input", {"name": "__VIEWSTATE"})
-                eventvalidation = soup.find("input", {"name": "__EVENTVALIDATION"})
-                viewstate_generator = soup.find(
-                    "input", {"name": "__VIEWSTATEGENERATOR"}
-                )
+                fields = {
+                    name.decode(): html.unescape(value.decode())
+                    for name, value in _HIDDEN_FIELD_RE.findall(content)
+                }
+                viewstate = fields.get("__VIEWSTATE")
+                eventvalidation = fields.get("__EVENTVALIDATION")
 
-                if not viewstate or not eventvalidation:
+                if viewstate is None or eventvalidation is None:
                     _LOGGER.warning("Failed to extract form tokens from login page")
                     if attempt == max_retries - 1:
                         return False
@@ -106,13 +375,11 @@ class SFPUCScraper:
                 login_data = {
                     "__EVENTTARGET": "",
                     "__EVENTARGUMENT": "",
-                    "__VIEWSTATE": viewstate["value"],
-                    "__VIEWSTATEGENERATOR": (
-                        viewstate_generator["value"] if viewstate_generator else ""
-                    ),
+                    "__VIEWSTATE": viewstate,
+                    "__VIEWSTATEGENERATOR": fields.get("__VIEWSTATEGENERATOR", ""),
                     "__SCROLLPOSITIONX": "0",
                     "__SCROLLPOSITIONY": "0",
-                    "__EVENTVALIDATION": eventvalidation["value"],
+                    "__EVENTVALIDATION": eventvalidation,
                     "tb_USER_ID": self.username,
                     "tb_USER_PSWD": self.password,
                     "cb_REMEMBER_ME": "on",
@@ -121,109 +388,80 @@ class SFPUCScraper:
 
                 # Submit login
                 _LOGGER.debug("Submitting login form")
-                response = self.session.post(
-                    login_url,
-                    data=login_data,
-                    allow_redirects=True,
-                    timeout=self.timeout,
-                )
-                _LOGGER.debug(
-                    "Login response status: %s, URL: %s",
-                    response.status_code,
-                    response.url,
-                )
+                async with session.post(
+                    login_url, data=login_data, allow_redirects=True
+                ) as response:
+                    status = response.status
+                    url = str(response.url)
+                    body = await response.read()
+                _LOGGER.debug("Login response status: %s, URL: %s", status, url)
 
                 # Check if login successful
                 # Look for indicators of successful login vs failure
-                if response.status_code == 200:
-                    # Check for common success indicators
-                    success_indicators = [
-                        "MY_ACCOUNT_RSF.aspx" in response.url,
-                        "Welcome" in response.text,
-                        "Dashboard" in response.text,
-                        "Account" in response.text,
-                        "Usage" in response.text,
-                        "Logout" in response.text,
-                    ]
-
-                    # Check for failure indicators
-                    failure_indicators = [
-                        "Invalid" in response.text
-                        and "password" in response.text.lower(),
-                        "Login failed" in response.text,
-                        "Authentication failed" in response.text,
-                        "Error" in response.text and "login" in response.text.lower(),
-                        "Please try again" in response.text,
-                        response.url.endswith("/"),  # Still on login page
-                    ]
-
-                    success_score = sum(success_indicators)
-                    failure_score = sum(failure_indicators)
-
-                    _LOGGER.debug(
-                        "Login analysis - Success indicators: %d, Failure indicators: %d",
-                        success_score,
-                        failure_score,
+                if status == 200:
+                    # Check for common success and failure indicators
+                    # The markers are ASCII, so the body is searched as bytes
+                    # without decoding it
+                    success = (
+                        "MY_ACCOUNT_RSF.aspx" in url
+                        or _LOGIN_SUCCESS_RE.search(body) is not None
                     )
-                    _LOGGER.debug("Response URL: %s", response.url)
-                    _LOGGER.debug(
-                        "Response contains 'Welcome': %s", "Welcome" in response.text
+                    failure = (
+                        url.endswith("/")  # Still on login page
+                        or _LOGIN_FAILURE_RE.search(body) is not None
                     )
+                    if not failure and (b"Invalid" in body or b"Error" in body):
+                        # Lowercase only when a generic error word shows up
+                        lowered = body.lower()
+                        failure = (b"Invalid" in body and b"password" in lowered) or (
+                            b"Error" in body and b"login" in lowered
+                        )
+
                     _LOGGER.debug(
-                        "Response contains 'Invalid': %s", "Invalid" in response.text
+                        "Login analysis - Success indicators: %s, Failure indicators: %s",
+                        success,
+                        failure,
                     )
 
-                    if success_score > 0 and failure_score == 0:
+                    if success and not failure:
                         _LOGGER.info(
                             "SFPUC login successful for user: %s",
-                            self.username[:3] + "***",
+                            self._masked_username,
                         )
                         return True
                     else:
                         _LOGGER.warning(
-                            "SFPUC login failed - success_score: %d, failure_score: %d",
-                            success_score,
-                            failure_score,
+                            "SFPUC login failed - success indicators: %s, failure indicators: %s",
+                            success,
+                            failure,
                         )
                         return False
                 else:
-                    _LOGGER.warning(
-                        "SFPUC login failed with status code: %s", response.status_code
-                    )
+                    _LOGGER.warning("SFPUC login failed with status code: %s", status)
                     if attempt == max_retries - 1:
                         return False
                     continue
 
-            except (
-                requests.exceptions.Timeout,
-                requests.exceptions.ConnectionError,
-            ) as e:
+            except (aiohttp.ClientError, TimeoutError) as e:
                 _LOGGER.warning(
                     "Network error during SFPUC login attempt %d/%d for user %s: %s",
                     attempt + 1,
                     max_retries,
-                    self.username[:3] + "***",
+                    self._masked_username,
                     e,
                 )
                 if attempt == max_retries - 1:
                     _LOGGER.error(
                         "All login attempts failed for user %s: %s",
-                        self.username[:3] + "***",
+                        self._masked_username,
                         e,
                     )
                     return False
                 continue
-            except Exception as e:
-                _LOGGER.error(
-                    "Exception during SFPUC login for user %s: %s",
-                    self.username[:3] + "***",
-                    e,
-                )
-                return False
 
         return False
 
-    def get_usage_data(
+    async def get_usage_data(
         self,
         start_date: datetime,
         end_date: datetime | None = None,
@@ -242,6 +480,161 @@ class SFPUCScraper:
         if end_date is None:
             end_date = start_date
 
+        if resolution not in _USAGE_PAGES:
+            _LOGGER.error("Invalid resolution specified: %s", resolution)
+            return None
+
+        if not await self.async_ensure_logged_in():
+            return None
+
+        try:
+            async with self._export_lock:
+                return await self._async_fetch_usage_data(
+                    start_date, end_date, resolution
+                )
+        except _SessionExpiredError:
+            _LOGGER.info("SFPUC session expired, logging in again")
+            self._logged_in = False
+
+        if not await self.login():
+            return None
+
+        try:
+            async with self._export_lock:
+                return await self._async_fetch_usage_data(
+                    start_date, end_date, resolution
+                )
+        except _SessionExpiredError:
+            _LOGGER.warning(
+                "SFPUC session expired again right after login for user %s",
+                self._masked_username,
+            )
+            self._logged_in = False
+            return None
+
+    async def _async_parse_export(
+        self,
+        response: aiohttp.ClientResponse,
+        resolution: str,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> list[dict[str, Any]]:
+        """Parse the tab-separated (Excel) export line by line as it arrives.
+
+        Args:
+            response: The download response, whose body has not been read yet.
+            resolution: Resolution of the export ('hourly', 'daily' or 'monthly').
+            start_date: Start of the requested range, used to infer years.
+            end_date: End of the requested range, used to date hourly rows.
+
+        Returns:
+            List of parsed usage data points; unparseable rows are skipped.
+        """
+        usage_data = []
+        header = True
+        async for raw_line in response.content:
+            if header:
+                header = False  # Skip header
+                continue
+            # Only the first two columns are used; partition the raw bytes and
+            # decode just those two fields rather than the whole line
+            timestamp_raw, sep, rest = raw_line.partition(b"\t")
+            if not sep:
+                continue
+            usage_raw = rest.partition(b"\t")[0].rstrip(b"\r\n")
+            point = self._parse_usage_row(
+                timestamp_raw.decode("utf-8", errors="ignore"),
+                usage_raw.decode("utf-8", errors="ignore"),
+                resolution,
+                start_date,
+                end_date,
+            )
+            if point is not None:
+                usage_data.append(point)
+        return usage_data
+
+    @staticmethod
+    def _parse_usage_row(
+        timestamp_str: str,
+        usage_str: str,
+        resolution: str,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> dict[str, Any] | None:
+        """Parse one export row into a usage data point, or None if malformed."""
+        try:
+            usage = float(usage_str)
+        except ValueError as e:
+            _LOGGER.debug(
+                "Failed to parse row: %s\t%s, error: %s", timestamp_str, usage_str, e
+            )
+            return None
+
+        try:
+            timestamp = _TIMESTAMP_PARSERS[resolution](
+                timestamp_str.strip(), start_date, end_date
+            )
+        except (ValueError, KeyError):
+            _LOGGER.debug("Failed to parse %s timestamp: %s", resolution, timestamp_str)
+            return None
+
+        return {"timestamp": timestamp, "usage": usage, "resolution": resolution}
+
+    async def _async_get_form_tokens(
+        self, session: aiohttp.ClientSession, usage_url: str, resolution: str
+    ) -> dict[str, str]:
+        """Return the form tokens of a usage page, scraping it if not cached.
+
+        Raises:
+            _SessionExpiredError: If the portal redirected to the login page.
+        """
+        if (tokens := self._form_tokens.get(resolution)) is not None:
+            return tokens
+
+        _LOGGER.debug("Navigating to usage page: %s", usage_url)
+        max_retries = 3
+        for attempt in range(max_retries):
+            async with session.get(usage_url) as response:
+                status = response.status
+                _LOGGER.debug("Usage page response status: %s", status)
+                if self._is_login_page(status, str(response.url)):
+                    raise _SessionExpiredError
+                if status not in _RETRY_STATUSES or attempt == max_retries - 1:
+                    content = await response.read()
+                    break
+            # Back off briefly on a transient server error; the pooled
+            # connection stays open, so the retry skips the TLS handshake
+            await asyncio.sleep(_RETRY_BACKOFF * 2**attempt)
+
+        # Extract form tokens straight from the <input> tags; the page has a
+        # single form, so no document tree is needed
+        tokens = {}
+        for tag in _INPUT_TAG_RE.findall(content):
+            name = _NAME_ATTR_RE.search(tag)
+            if name is None or not name.group(1):
+                continue
+            value = _VALUE_ATTR_RE.search(tag)
+            tokens[html.unescape(name.group(1).decode())] = (
+                html.unescape(value.group(1).decode()) if value else ""
+            )
+
+        _LOGGER.debug("Extracted %d form tokens", len(tokens))
+        # Only a successful page load is cached, error pages are scraped again
+        if status not in _RETRY_STATUSES:
+            self._form_tokens[resolution] = tokens
+        return tokens
+
+    async def _async_fetch_usage_data(
+        self, start_date: datetime, end_date: datetime, resolution: str
+    ) -> list[dict[str, Any]] | None:
+        """Download and parse usage data using the current session.
+
+        Network errors are logged and reported as None; unexpected errors
+        propagate.
+
+        Raises:
+            _SessionExpiredError: If the portal redirected to the login page.
+        """
         try:
             _LOGGER.debug(
                 "Fetching %s usage data from %s to %s",
@@ -251,48 +644,21 @@ class SFPUCScraper:
             )
 
             # Navigate to appropriate usage page based on resolution
-            if resolution == "hourly":
-                usage_url = f"{self.base_url}/USE_HOURLY.aspx"
-                data_type = "Hourly+Use"
-            elif resolution == "daily":
-                usage_url = f"{self.base_url}/USE_DAILY.aspx"
-                data_type = "Daily+Use"
-            elif resolution == "monthly":
-                # Use the billed usage page for monthly data
-                usage_url = f"{self.base_url}/USE_BILLED.aspx"
-                data_type = "Billed+Use"
-            else:
-                _LOGGER.error("Invalid resolution specified: %s", resolution)
-                return None
-
-            _LOGGER.debug("Navigating to usage page: %s", usage_url)
-            response = self.session.get(usage_url, timeout=self.timeout)
-            _LOGGER.debug("Usage page response status: %s", response.status_code)
-
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            # Extract form tokens
-            tokens = {}
-            form = soup.find("form")
-            if form:
-                for inp in form.find_all("input"):
-                    name = inp.get("name")
-                    if name:
-                        tokens[name] = inp.get("value", "")
-
-            _LOGGER.debug("Extracted %d form tokens", len(tokens))
-
-            # Set download parameters
-            tokens.update(
-                {
-                    "img_EXCEL_DOWNLOAD_IMAGE.x": "8",
-                    "img_EXCEL_DOWNLOAD_IMAGE.y": "13",
-                    "tb_DAILY_USE": data_type,
-                    "SD": start_date.strftime("%m/%d/%Y"),
-                    "ED": end_date.strftime("%m/%d/%Y"),
-                    "dl_UOM": "GALLONS",
-                }
-            )
+            usage_page, data_type = _USAGE_PAGES[resolution]
+            usage_url = f"{self.base_url}/{usage_page}"
+
+            session = await self._ensure_session()
+            download_params = {
+                **_STATIC_DOWNLOAD_PARAMS,
+                "tb_DAILY_USE": data_type,
+                "SD": start_date.strftime("%m/%d/%Y"),
+                "ED": end_date.strftime("%m/%d/%Y"),
+            }
+            tokens = await self._async_get_form_tokens(session, usage_url, resolution)
+
+            # Revalidate a previous download of the same export if we have one
+            cache_key = (resolution, start_date.date(), end_date.date())
+            cached = self._export_cache.get(cache_key)
 
             # POST to trigger download with retry logic
             max_retries = 3
@@ -308,139 +674,48 @@ class SFPUCScraper:
                             attempt + 1,
                             max_retries,
                         )
-                        time.sleep(delay)
-
-                    if resolution == "monthly":
-                        download_url = f"{self.base_url}/USE_BILLED.aspx"
-                    else:
-                        download_url = f"{self.base_url}/USE_{resolution.upper()}.aspx"
-                    _LOGGER.debug("Triggering Excel download from: %s", download_url)
-                    response = self.session.post(
-                        download_url,
-                        data=tokens,
-                        allow_redirects=True,
-                        timeout=self.timeout,
-                    )
-                    _LOGGER.debug(
-                        "Download response status: %s, URL: %s",
-                        response.status_code,
-                        response.url,
-                    )
-
-                    if "TRANSACTIONS_EXCEL_DOWNLOAD.aspx" in response.url:
-                        # Parse the Excel data
-                        content = response.content.decode("utf-8", errors="ignore")
-                        lines = content.split("\n")
-                        _LOGGER.debug("Downloaded content has %d lines", len(lines))
-
-                        usage_data = []
-                        for line in lines[1:]:  # Skip header
-                            if line.strip():
-                                parts = line.split("\t")
-                                if len(parts) >= 2:
-                                    try:
-                                        # Parse timestamp and usage
-                                        timestamp_str = parts[0].strip()
-                                        usage = float(parts[1])
-
-                                        # Parse timestamp based on resolution
-                                        if resolution == "hourly":
-                                            # SFPUC hourly format: "12 AM", "1 PM", etc.
-                                            try:
-                                                hour_str, am_pm = timestamp_str.split()
-                                                am_pm = am_pm.upper()
-                                                hour = int(hour_str)
-                                                if am_pm == "PM" and hour != 12:
-                                                    hour += 12
-                                                elif am_pm == "AM" and hour == 12:
-                                                    hour = 0
-                                                # Use the requested end_date for hourly data
-                                                # SFPUC typically shows hourly data up to 2 days ago
-                                                request_date = end_date.date()
-                                                timestamp = datetime.combine(
-                                                    request_date,
-                                                    datetime.min.time().replace(
-                                                        hour=hour
-                                                    ),
-                                                )
-                                            except (ValueError, IndexError):
-                                                _LOGGER.debug(
-                                                    "Failed to parse hourly timestamp: %s",
-                                                    timestamp_str,
-                                                )
-                                                continue
-
-                                        elif resolution == "daily":
-                                            # SFPUC daily format: "MM/DD" (no year)
-                                            try:
-                                                month, day = map(
-                                                    int, timestamp_str.split("/")
-                                                )
-                                                # Infer year from requested date range
-                                                requested_year = start_date.year
-                                                timestamp = datetime(
-                                                    requested_year, month, day
-                                                )
-
-                                                # Handle year boundaries for cross-year requests
-                                                if (
-                                                    timestamp < start_date
-                                                    and start_date.month == 12
-                                                    and month == 1
-                                                ):
-                                                    timestamp = datetime(
-                                                        requested_year + 1, month, day
-                                                    )
-                                                elif (
-                                                    timestamp > end_date
-                                                    and end_date.month == 1
-                                                    and month == 12
-                                                ):
-                                                    timestamp = datetime(
-                                                        requested_year - 1, month, day
-                                                    )
-                                            except (ValueError, IndexError):
-                                                _LOGGER.debug(
-                                                    "Failed to parse daily timestamp: %s",
-                                                    timestamp_str,
-                                                )
-                                                continue
-
-                                        elif resolution == "monthly":
-                                            # SFPUC monthly format: "Mon YY" (like "Dec 23")
-                                            try:
-                                                month_name, year_str = (
-                                                    timestamp_str.split()
-                                                )
-                                                month = datetime.strptime(
-                                                    month_name, "%b"
-                                                ).month
-                                                year = 2000 + int(
-                                                    year_str
-                                                )  # Convert 2-digit to 4-digit
-                                                timestamp = datetime(year, month, 1)
-                                            except (ValueError, IndexError):
-                                                _LOGGER.debug(
-                                                    "Failed to parse monthly timestamp: %s",
-                                                    timestamp_str,
-                                                )
-                                                continue
-
-                                        usage_data.append(
-                                            {
-                                                "timestamp": timestamp,
-                                                "usage": usage,
-                                                "resolution": resolution,
-                                            }
-                                        )
-                                    except (ValueError, IndexError) as e:
-                                        _LOGGER.debug(
-                                            "Failed to parse line: %s, error: %s",
-                                            line.strip(),
-                                            e,
-                                        )
-                                        continue
-
+                        await asyncio.sleep(delay)
+
+                    # The download is a postback to the usage page itself,
+                    # which redirects to the export. The redirect is followed
+                    # by hand so that only the export GET, the request HTTP
+                    # validators apply to, is made conditional.
+                    _LOGGER.debug("Triggering Excel download from: %s", usage_url)
+                    usage_data: list[dict[str, Any]] = []
+                    validators: dict[str, str] = {}
+                    async with session.post(
+                        usage_url,
+                        data={**tokens, **download_params},
+                        allow_redirects=False,
+                    ) as response:
+                        status = response.status
+                        url = str(response.url)
+                        if location := response.headers.get("Location"):
+                            url = urljoin(url, location)
+                    is_export = "TRANSACTIONS_EXCEL_DOWNLOAD.aspx" in url
+                    if is_export:
+                        async with session.get(
+                            url, headers=cached[0] if cached else None
+                        ) as response:
+                            status = response.status
+                            url = str(response.url)
+                            validators = self._conditional_headers(response.headers)
+                            is_export = "TRANSACTIONS_EXCEL_DOWNLOAD.aspx" in url
+                            if is_export and status != 304:
+                                # Parse while the body streams in so memory
+                                # stays flat no matter how long the requested
+                                # range is
+                                usage_data = await self._async_parse_export(
+                                    response, resolution, start_date, end_date
+                                )
+                    _LOGGER.debug("Download response status: %s, URL: %s", status, url)
+
+                    if status == 304 and cached:
+                        _LOGGER.debug(
+                            "%s export unchanged since last download", resolution
+                        )
+                        return list(cached[1])
+                    if is_export:
                         if usage_data:
                             dates: list[datetime] = [
                                 cast(datetime, item["timestamp"]) for item in usage_data
@@ -456,32 +731,46 @@ class SFPUCScraper:
                             _LOGGER.info(
                                 "Successfully parsed 0 %s data points", resolution
                             )
+                        if validators:
+                            self._export_cache.pop(cache_key, None)
+                            if len(self._export_cache) >= _EXPORT_CACHE_SIZE:
+                                # Drop the oldest entry (dicts keep insertion order)
+                                del self._export_cache[next(iter(self._export_cache))]
+                            self._export_cache[cache_key] = (
+                                validators,
+                                list(usage_data),
+                            )
                         return usage_data
+                    elif self._is_login_page(status, url):
+                        raise _SessionExpiredError
                     else:
-                        _LOGGER.warning(
-                            "Download failed - unexpected URL: %s", response.url
-                        )
+                        _LOGGER.warning("Download failed - unexpected URL: %s", url)
                         if attempt == max_retries - 1:
+                            # The session may be broken in a way we don't
+                            # recognize; start the next poll with a new login
+                            self._logged_in = False
                             return None
+                        # The cached tokens may be stale, scrape them again
+                        self._form_tokens.pop(resolution, None)
+                        tokens = await self._async_get_form_tokens(
+                            session, usage_url, resolution
+                        )
                         continue
 
-                except (
-                    requests.exceptions.Timeout,
-                    requests.exceptions.ConnectionError,
-                ) as e:
+                except (aiohttp.ClientError, TimeoutError) as e:
                     _LOGGER.warning(
                         "Network error during %s data download attempt %d/%d for user %s: %s",
                         resolution,
                         attempt + 1,
                         max_retries,
-                        self.username[:3] + "***",
+                        self._masked_username,
                         e,
                     )
                     if attempt == max_retries - 1:
                         _LOGGER.error(
                             "All %s data download attempts failed for user %s: %s",
                             resolution,
-                            self.username[:3] + "***",
+                            self._masked_username,
                             e,
                         )
                         return None
@@ -490,25 +779,32 @@ class SFPUCScraper:
             # If we exhausted all retries without returning, return None
             return None
 
-        except Exception as e:
+        except (aiohttp.ClientError, TimeoutError) as e:
+            # Network failure loading the usage page; anything else is a bug
+            # and propagates to the caller
             _LOGGER.error(
-                "Exception during %s data retrieval for user %s: %s",
+                "Network error during %s data retrieval for user %s: %s",
                 resolution,
-                self.username[:3] + "***",
+                self._masked_username,
                 e,
             )
             return None
 
-    def get_daily_usage(self) -> float | None:
-        """Get today's water usage in gallons (legacy method for backward compatibility).
+    async def get_daily_usage(self, day: datetime | None = None) -> float | None:
+        """Get a day's water usage in gallons (legacy method for backward compatibility).
+
+        Convenience method that aggregates hourly usage data for a single day.
 
-        Convenience method that aggregates hourly usage data for the current day.
+        Args:
+            day: Day to total. Defaults to today; pass the caller's reference
+                time to keep retries on the same day across midnight.
 
         Returns:
-            Total water usage for today in gallons, or None if data retrieval fails.
+            Total water usage for the day in gallons, or None if data retrieval fails.
         """
-        today = datetime.now()
-        data = self.get_usage_data(today, today, "hourly")
+        if day is None:
+            day = datetime.now()
+        data = await self.get_usage_data(day, day, "hourly")
         if data:
             # Sum all hourly usage for the day
             return sum(item["usage"] for item in data)
@@ -1,5 +1,7 @@
 """Statistics handling utilities for SFPUC coordinator."""
 
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
 from typing import Any
 import zoneinfo
 
@@ -11,6 +13,7 @@ from homeassistant.components.recorder.models import (
 )
 from homeassistant.components.recorder.statistics import (
     async_add_external_statistics,
+    get_last_statistics,
     statistics_during_period,
 )
 from homeassistant.components.recorder.util import DATA_INSTANCE
@@ -19,33 +22,62 @@ from homeassistant.util import dt as dt_util
 
 from .const import CONF_USERNAME, DOMAIN
 
+# SFPUC exports carry naive San Francisco local times
+_SF_TIMEZONE = zoneinfo.ZoneInfo("America/Los_Angeles")
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    """Return a scraped timestamp as UTC (HA stores statistics in UTC).
+
+    Naive timestamps are San Francisco local time.
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=_SF_TIMEZONE)
+    return dt_util.as_utc(timestamp)
+
+
+def _statistic_metadata(statistic_id: str) -> StatisticMetaData:
+    """Return the statistic metadata for an account's statistic ID.
+
+    A fresh dict is built for every insertion, so nothing the recorder does
+    with it can leak into later inserts.
+    """
+    # Use SINGLE statistic ID for all resolutions
+    # This consolidates hourly, daily, and monthly data into one statistic
+    return StatisticMetaData(
+        has_sum=True,
+        mean_type=StatisticMeanType.NONE,
+        name="San Francisco Water Power Sewer",
+        source=DOMAIN,
+        # Use a valid statistic_id for external statistics
+        statistic_id=statistic_id,
+        unit_of_measurement=UnitOfVolume.GALLONS.value,
+    )
+
 
 async def async_insert_statistics(
-    coordinator, usage_data: float | list[dict[str, Any]]
+    coordinator,
+    usage_data: list[dict[str, Any]],
+    resolution: str | None = None,
 ) -> None:
     """Insert water usage statistics into Home Assistant.
 
-    Handles both legacy (float) and new (list) data formats.
     Groups data points by resolution and delegates to appropriate
     resolution-specific insertion methods.
 
     Args:
-        usage_data: Either a float representing daily usage (legacy format)
-                   or a list of dictionaries containing 'timestamp', 'usage',
+        usage_data: List of dictionaries containing 'timestamp', 'usage',
                    and 'resolution' keys.
+        resolution: Resolution shared by every data point, when the caller
+                   already knows it. Skips the grouping pass.
 
     Logs warnings if insertion fails but does not raise exceptions.
     """
-    try:
-        if isinstance(usage_data, (int, float)):
-            # Legacy format: single daily usage value
-            coordinator.logger.debug(
-                "Inserting legacy statistics format: %.2f", usage_data
-            )
-            await async_insert_legacy_statistics(coordinator, usage_data)
-            return
+    if DATA_INSTANCE not in coordinator.hass.data:
+        coordinator.logger.warning("Recorder not available, skipping statistics")
+        return
 
-        # New format: list of data points
+    try:
         if not usage_data:
             coordinator.logger.debug("No usage data to insert")
             return
@@ -54,36 +86,35 @@ async def async_insert_statistics(
             "Processing %d data points for statistics insertion", len(usage_data)
         )
 
-        # Group data by resolution (skip monthly data)
-        hourly_data = []
-        daily_data = []
-        monthly_data = []  # Enabled - billing cycles are now supported
+        if resolution is not None:
+            await async_insert_resolution_statistics(
+                coordinator, usage_data, resolution
+            )
+            return
 
+        # Group data by resolution in a single pass; unknown resolutions are
+        # dropped. Insertion order (hourly, daily, monthly) follows the keys.
+        grouped: dict[str, list[dict[str, Any]]] = {
+            "hourly": [],
+            "daily": [],
+            "monthly": [],  # Enabled - billing cycles are now supported
+        }
         for item in usage_data:
-            resolution = item.get("resolution", "daily")
-            if resolution == "hourly":
-                hourly_data.append(item)
-            elif resolution == "daily":
-                daily_data.append(item)
-            elif resolution == "monthly":
-                monthly_data.append(item)
+            points = grouped.get(item.get("resolution", "daily"))
+            if points is not None:
+                points.append(item)
 
         coordinator.logger.debug(
             "Grouped data - Hourly: %d, Daily: %d, Monthly: %d",
-            len(hourly_data),
-            len(daily_data),
-            len(monthly_data),
+            len(grouped["hourly"]),
+            len(grouped["daily"]),
+            len(grouped["monthly"]),
         )
 
         # Insert statistics for each resolution
-        if hourly_data:
-            await async_insert_resolution_statistics(coordinator, hourly_data, "hourly")
-        if daily_data:
-            await async_insert_resolution_statistics(coordinator, daily_data, "daily")
-        if monthly_data:
-            await async_insert_resolution_statistics(
-                coordinator, monthly_data, "monthly"
-            )
+        for group, points in grouped.items():
+            if points:
+                await async_insert_resolution_statistics(coordinator, points, group)
 
     except Exception as err:
         coordinator.logger.warning("Failed to insert water usage statistics: %s", err)
@@ -100,132 +131,126 @@ async def async_insert_resolution_statistics(
 
     Args:
         data_points: List of dictionaries with 'timestamp' and 'usage' keys.
-                    Timestamps should be timezone-naive (assumed local to SF).
+                    Timestamps should be timezone-naive (assumed local to SF)
+                    and already aligned to the start of their period.
         resolution: Data resolution - 'hourly' or 'daily'. Determines statistic ID
                    and metadata.
 
     Logs warnings if insertion fails but does not raise exceptions.
     """
+    if resolution not in ("hourly", "daily", "monthly"):
+        coordinator.logger.warning("Unsupported statistics resolution: %s", resolution)
+        return
+
+    # Check if recorder is available before doing any work for it
+    if DATA_INSTANCE not in coordinator.hass.data:
+        coordinator.logger.warning(
+            "Recorder not available, skipping %s statistics insertion",
+            resolution,
+        )
+        return
+
     try:
         coordinator.logger.debug(
             "Inserting %d %s statistics", len(data_points), resolution
         )
 
-        # Sort data points by timestamp to ensure correct cumulative sum calculation
-        data_points = sorted(data_points, key=lambda x: x["timestamp"])
-
         # Deduplicate by timestamp (keep last occurrence to get most recent data)
-        seen_timestamps = {}
-        for point in data_points:
-            timestamp_key = point["timestamp"]
-            seen_timestamps[timestamp_key] = point
-
-        # Convert back to list, maintaining sorted order
-        data_points = list(seen_timestamps.values())
-        data_points.sort(key=lambda x: x["timestamp"])
+        # and sort to ensure correct cumulative sum calculation. Only the
+        # (timestamp, usage) pairs are needed from here on.
+        usage_by_timestamp = {
+            point["timestamp"]: point["usage"] for point in data_points
+        }
+        points = tuple(sorted(usage_by_timestamp.items()))
 
         coordinator.logger.debug(
-            "After deduplication: %d %s statistics", len(data_points), resolution
+            "After deduplication: %d %s statistics", len(points), resolution
         )
 
-        # Create statistic metadata based on resolution
-        # Use SINGLE statistic ID for all resolutions
-        # This consolidates hourly, daily, and monthly data into one statistic
-        account_number = coordinator.config_entry.data.get(CONF_USERNAME, "default")
-        # Sanitize account number (lowercase, replace special chars)
-        safe_account = account_number.lower().replace("-", "_").replace(" ", "_")
-
-        # Use a valid statistic_id for external statistics
-        stat_id = f"{DOMAIN}:{safe_account}_water_consumption"
-        name = "San Francisco Water Power Sewer"
-        has_sum = True
-
-        metadata = StatisticMetaData(
-            has_sum=has_sum,
-            mean_type=StatisticMeanType.NONE,
-            name=name,
-            source=DOMAIN,
-            statistic_id=stat_id,
-            unit_of_measurement=UnitOfVolume.GALLONS.value,
-        )
+        # Polls often return exactly what was stored last time (SFPUC hasn't
+        # posted a new reading yet); skip the recorder query and write then
+        if coordinator._last_inserted_statistics.get(resolution) == points:
+            coordinator.logger.debug(
+                "%s statistics unchanged since last insertion, skipping", resolution
+            )
+            return
 
-        # Get existing statistics to detect duplicates and continue cumulative sum
-        # Query the past 3 years to cover all potential overlaps
-        from datetime import timedelta
+        stat_id = coordinator._stat_id
+        metadata = _statistic_metadata(stat_id)
 
-        end_time = dt_util.now()
-        start_time_query = end_time - timedelta(days=365 * 3)
+        recorder = get_instance(coordinator.hass)
 
-        existing_stats = await get_instance(coordinator.hass).async_add_executor_job(
-            statistics_during_period,
+        # Fetch the newest stored statistic first; when every point is newer
+        # (the usual poll), there is nothing to deduplicate against and the
+        # multi-year scan below can be skipped
+        last_stats = await recorder.async_add_executor_job(
+            get_last_statistics,
             coordinator.hass,
-            start_time_query,
-            end_time,
-            {stat_id},
-            "hour",  # Use hour period for detailed duplicate detection
-            None,  # units
-            {"sum"},  # types - we only need sum for continuation
+            1,  # num_stats
+            stat_id,
+            True,  # convert_units
+            {"sum"},  # types
         )
+        last_stat = last_stats[stat_id][0] if last_stats.get(stat_id) else None
 
         # Build set of existing timestamps (as Unix timestamps) for exact duplicate detection
         existing_timestamps = set()
         cumulative_sum = 0.0
         earliest_existing_time = None
 
-        if stat_id in existing_stats and existing_stats[stat_id]:
-            # Sort by timestamp to get latest sum and time boundaries
-            sorted_stats = sorted(existing_stats[stat_id], key=lambda x: x["start"])
-            # Store timestamps as Unix timestamps for precise comparison
-            existing_timestamps = {stat["start"] for stat in sorted_stats}
-            # Get time boundaries
-            earliest_existing_time = sorted_stats[0]["start"]
-            # Continue from last sum (only valid when appending after existing data)
-            cumulative_sum = sorted_stats[-1].get("sum") or 0.0
+        if last_stat is None:
             coordinator.logger.debug(
-                "Found %d existing %s statistics (from %s to %s), latest sum: %.2f",
-                len(existing_timestamps),
+                "No existing statistics found, starting fresh for %s", resolution
+            )
+        elif _as_utc(points[0][0]).timestamp() > last_stat["start"]:
+            cumulative_sum = last_stat.get("sum") or 0.0
+            coordinator.logger.debug(
+                "All %s statistics are newer than the latest stored one, "
+                "continuing from sum: %.2f",
                 resolution,
-                sorted_stats[0]["start"],
-                sorted_stats[-1]["start"],
                 cumulative_sum,
             )
         else:
+            # Get existing statistics to detect duplicates and continue cumulative sum
+            # Query the past 3 years to cover all potential overlaps
+            end_time = dt_util.now()
+            start_time_query = end_time - timedelta(days=365 * 3)
+
+            existing_stats = await recorder.async_add_executor_job(
+                statistics_during_period,
+                coordinator.hass,
+                start_time_query,
+                end_time,
+                {stat_id},
+                "hour",  # Use hour period for detailed duplicate detection
+                None,  # units
+                {"sum"},  # types - we only need sum for continuation
+            )
+
+            if existing_stats.get(stat_id):
+                # Sort by timestamp to get latest sum and time boundaries
+                sorted_stats = sorted(existing_stats[stat_id], key=lambda x: x["start"])
+                # Store timestamps as Unix timestamps for precise comparison
+                existing_timestamps = {stat["start"] for stat in sorted_stats}
+                # Get time boundaries
+                earliest_existing_time = sorted_stats[0]["start"]
+            # Continue from last sum (only valid when appending after existing data)
+            cumulative_sum = last_stat.get("sum") or 0.0
             coordinator.logger.debug(
-                "No existing statistics found, starting fresh for %s", resolution
+                "Found %d existing %s statistics, latest sum: %.2f",
+                len(existing_timestamps),
+                resolution,
+                cumulative_sum,
             )
 
-        # Create statistic data points
-        statistic_data = []
+        # Collect the points that are new to the recorder, as UTC times
+        new_points: list[tuple[datetime, float]] = []
         skipped_older_than_existing = 0
 
-        for point in data_points:
-            timestamp = point["timestamp"]
-            usage = point["usage"]
-
-            # Adjust timestamp based on resolution
-            if resolution == "hourly":
-                start_time = timestamp
-            elif resolution == "daily":
-                start_time = timestamp.replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                )
-            elif resolution == "monthly":
-                start_time = timestamp.replace(
-                    day=1, hour=0, minute=0, second=0, microsecond=0
-                )
-
-            # Convert naive timestamp to timezone-aware UTC (HA stores statistics in UTC)
-            if start_time.tzinfo is None:
-                # Treat naive timestamp as San Francisco local time
-                # Localize to SF timezone, then convert to UTC
-                sf_timezone = zoneinfo.ZoneInfo("America/Los_Angeles")
-                # Create a new aware datetime by interpreting the naive time as SF local time
-                start_time_aware = start_time.replace(tzinfo=sf_timezone)
-                # Convert to UTC
-                start_time = dt_util.as_utc(start_time_aware)
-            else:
-                # Already timezone-aware, convert to UTC
-                start_time = dt_util.as_utc(start_time)
+        for timestamp, usage in points:
+            # The scraper already emits daily points at midnight and monthly
+            # points on the 1st, so timestamps are used as-is
+            start_time = _as_utc(timestamp)
 
             # Skip exact duplicate timestamps (already in database)
             if start_time.timestamp() in existing_timestamps:
@@ -245,17 +270,24 @@ async def async_insert_resolution_statistics(
                 skipped_older_than_existing += 1
                 continue
 
-            # Accumulate sum for Energy Dashboard
-            cumulative_sum += usage
+            new_points.append((start_time, usage))
 
-            # Store both state (period usage) and sum (cumulative total)
-            statistic_data.append(
-                StatisticData(
-                    start=start_time,
-                    state=usage,  # Individual period usage
-                    sum=cumulative_sum,  # Cumulative sum required by Energy Dashboard
-                )
+        # Accumulate sum for Energy Dashboard, continuing from the stored total
+        # (accumulate yields the starting total first, so skip it)
+        running_sums = islice(
+            accumulate((usage for _, usage in new_points), initial=cumulative_sum),
+            1,
+            None,
+        )
+        # Store both state (period usage) and sum (cumulative total)
+        statistic_data = [
+            StatisticData(
+                start=start_time,
+                state=usage,  # Individual period usage
+                sum=running_sum,  # Cumulative sum required by Energy Dashboard
             )
+            for (start_time, usage), running_sum in zip(new_points, running_sums)
+        ]
 
         # Insert statistics into Home Assistant recorder
         if not statistic_data:
@@ -270,13 +302,14 @@ async def async_insert_resolution_statistics(
                     "No new %s statistics to insert (all data points were duplicates)",
                     resolution,
                 )
+                coordinator._last_inserted_statistics[resolution] = points
             return
 
         coordinator.logger.debug(
             "Adding %d new %s statistics to recorder (continuing from sum=%.2f)%s",
             len(statistic_data),
             resolution,
-            cumulative_sum - sum(s["state"] for s in statistic_data),
+            cumulative_sum,
             (
                 f", skipped {skipped_older_than_existing} older than existing"
                 if skipped_older_than_existing > 0
@@ -284,19 +317,13 @@ async def async_insert_resolution_statistics(
             ),
         )
 
-        # Check if recorder is available before inserting statistics
-        if DATA_INSTANCE not in coordinator.hass.data:
-            coordinator.logger.warning(
-                "Recorder not available, skipping %s statistics insertion",
-                resolution,
-            )
-            return
-
         async_add_external_statistics(coordinator.hass, metadata, statistic_data)
+        coordinator._last_inserted_statistics[resolution] = points
+        coordinator._statistics_version += 1
         coordinator.logger.debug(
             "Successfully inserted %s statistics, final sum: %.2f",
             resolution,
-            cumulative_sum,
+            statistic_data[-1]["sum"],
         )
 
     except Exception as err:
@@ -306,60 +333,3 @@ async def async_insert_resolution_statistics(
             coordinator.config_entry.data.get(CONF_USERNAME, "unknown")[:3] + "***",
             err,
         )
-
-
-async def async_insert_legacy_statistics(coordinator, daily_usage: float) -> None:
-    """Insert legacy daily statistics (backward compatibility).
-
-    Creates a single daily statistic data point for the current day.
-    Used when legacy data format (float) is provided to async_insert_statistics.
-
-    Args:
-        daily_usage: Total water usage for the day in gallons.
-
-    Logs warnings if insertion fails but does not raise exceptions.
-    """
-    try:
-        # Create statistic metadata for daily water usage
-        # Use unified statistic ID (same as all other resolutions)
-        account_number = coordinator.config_entry.data.get(CONF_USERNAME, "default")
-        # Sanitize account number (lowercase, replace special chars)
-        safe_account = account_number.lower().replace("-", "_").replace(" ", "_")
-        metadata = StatisticMetaData(
-            has_sum=True,
-            mean_type=StatisticMeanType.NONE,
-            name="San Francisco Water Power Sewer",
-            source=DOMAIN,
-            statistic_id=f"{DOMAIN}:{safe_account}_water_consumption",
-            unit_of_measurement=UnitOfVolume.GALLONS.value,
-        )
-
-        # Get current date for the statistic
-        now = dt_util.now()
-        start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        # Create statistic data point
-        statistic_data = [
-            StatisticData(
-                start=start_of_day,
-                state=daily_usage,
-            )
-        ]
-
-        # Insert statistics into Home Assistant recorder
-
-        # Check if recorder is available before inserting statistics
-        if DATA_INSTANCE not in coordinator.hass.data:
-            coordinator.logger.warning(
-                "Recorder not available, skipping legacy statistics insertion"
-            )
-            return
-
-        async_add_external_statistics(coordinator.hass, metadata, statistic_data)
-
-    except Exception as err:
-        coordinator.logger.warning(
-            "Failed to insert legacy water usage statistics for account %s: %s",
-            coordinator.config_entry.data.get(CONF_USERNAME, "unknown")[:3] + "***",
-            err,
-        )
@@ -7,14 +7,18 @@ from homeassistant.components.recorder import get_instance
 from homeassistant.components.recorder.statistics import statistics_during_period
 from homeassistant.util import dt as dt_util
 
-from .const import CONF_USERNAME, DOMAIN
 
-
-def calculate_billing_period(coordinator) -> tuple[datetime, datetime]:
+def calculate_billing_period(
+    coordinator, now: datetime | None = None
+) -> tuple[datetime, datetime]:
     """Calculate current SFPUC billing period dates.
 
     Uses billing day detected from monthly data, or defaults to 25th.
 
+    Args:
+        now: The update's reference time, so every step of an update agrees on
+            "today" across midnight. Defaults to the current local time.
+
     Returns:
         Tuple of (bill_start_date, bill_end_date)
     """
@@ -24,27 +28,25 @@ def calculate_billing_period(coordinator) -> tuple[datetime, datetime]:
         coordinator._billing_day if coordinator._billing_day is not None else 25
     )
 
-    today = datetime.now()
-    current_month_bill_date = today.replace(
-        day=billing_day, hour=0, minute=0, second=0, microsecond=0
-    )
-
+    today = now if now is not None else datetime.now()
+    # Count months from year 0 so the year wrap needs no special casing
+    start_month = today.year * 12 + today.month - 1
     if today.day < billing_day:
         # Haven't hit this month's bill date yet
         # Period started last month's billing day
-        if today.month == 1:
-            bill_start = current_month_bill_date.replace(year=today.year - 1, month=12)
-        else:
-            bill_start = current_month_bill_date.replace(month=today.month - 1)
-        bill_end = current_month_bill_date
-    else:
-        # Past this month's bill date
-        # Period started this month's billing day
-        bill_start = current_month_bill_date
-        if today.month == 12:
-            bill_end = current_month_bill_date.replace(year=today.year + 1, month=1)
-        else:
-            bill_end = current_month_bill_date.replace(month=today.month + 1)
+        start_month -= 1
+    end_month = start_month + 1
+
+    bill_start = today.replace(
+        year=start_month // 12,
+        month=start_month % 12 + 1,
+        day=billing_day,
+        hour=0,
+        minute=0,
+        second=0,
+        microsecond=0,
+    )
+    bill_end = bill_start.replace(year=end_month // 12, month=end_month % 12 + 1)
 
     return bill_start, bill_end
 
@@ -63,19 +65,14 @@ async def async_detect_billing_day(coordinator) -> int:
 
     try:
         # Query monthly statistics to detect billing pattern
-        safe_account = (
-            coordinator.config_entry.data.get(CONF_USERNAME, "unknown")
-            .replace("-", "_")
-            .lower()
-        )
-        stat_id = f"{DOMAIN}:{safe_account}_water_consumption"
+        stat_id = coordinator._stat_id
 
         # Get last 3 months of billing data
-        three_months_ago = datetime.now() - timedelta(days=90)
+        three_months_ago = dt_util.utcnow() - timedelta(days=90)
         stats = await get_instance(coordinator.hass).async_add_executor_job(
             statistics_during_period,
             coordinator.hass,
-            dt_util.as_utc(three_months_ago),
+            three_months_ago,
             None,  # end_time (None = now)
             {stat_id},
             "month",
@@ -84,23 +81,21 @@ async def async_detect_billing_day(coordinator) -> int:
         )
 
         if stats and stat_id in stats and len(stats[stat_id]) >= 2:
-            # Extract days from monthly billing timestamps
-            billing_days: list[int] = []
-            for stat in stats[stat_id]:
-                start_time = stat.get("start")
-                if start_time and isinstance(start_time, datetime):
-                    # Convert to local timezone for accurate day extraction
-                    local_time = dt_util.as_local(start_time)
-                    billing_days.append(local_time.day)
+            # Count the local-timezone day of each monthly billing timestamp
+            billing_days = Counter(
+                dt_util.as_local(start_time).day
+                for stat in stats[stat_id]
+                if isinstance(start_time := stat.get("start"), datetime)
+            )
 
             # Use the most common billing day
             if billing_days:
-                most_common = Counter(billing_days).most_common(1)[0][0]
+                most_common = billing_days.most_common(1)[0][0]
                 coordinator._billing_day = most_common
                 coordinator.logger.info(
                     "Detected billing day: %d (from %d monthly records)",
                     coordinator._billing_day,
-                    len(billing_days),
+                    billing_days.total(),
                 )
                 return coordinator._billing_day
 
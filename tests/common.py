@@ -1,7 +1,7 @@
 """Common test utilities for San Francisco Water Power Sewer integration."""
 
 from typing import Any
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, MagicMock, Mock
 
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 
@@ -33,6 +33,7 @@ class MockConfigEntry:
         self.runtime_data = None
         self.state = None
         self.reason = None
+        self.on_unload_callbacks: list = []
 
     def add_to_hass(self, hass):
         """Add entry to hass."""
@@ -43,6 +44,10 @@ class MockConfigEntry:
         """Mock reauth start."""
         pass
 
+    def async_on_unload(self, func):
+        """Mock registering a callback to run when the entry unloads."""
+        self.on_unload_callbacks.append(func)
+
     def async_update_entry(self, **kwargs):
         """Mock update entry."""
         for key, value in kwargs.items():
@@ -55,11 +60,49 @@ class MockConfigEntry:
         return True
 
 
-def mock_session_response(content: str = "", url: str = "", status_code: int = 200):
-    """Create a mock requests response."""
-    response = Mock()
-    response.content = content.encode() if isinstance(content, str) else content
-    response.text = content
+def mock_session_response(
+    content: str | bytes = "",
+    url: str = "",
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+):
+    """Create a mock aiohttp response usable as an async context manager."""
+    body = content.encode() if isinstance(content, str) else content
+    response = MagicMock()
+    response.status = status_code
     response.url = url
-    response.status_code = status_code
+    response.headers = headers or {}
+    response.read = AsyncMock(return_value=body)
+    # Iterating the StreamReader yields the body line by line
+    response.content.__aiter__.return_value = body.splitlines(keepends=True)
+    response.text = AsyncMock(return_value=body.decode("utf-8", errors="ignore"))
+    response.__aenter__ = AsyncMock(return_value=response)
+    response.__aexit__ = AsyncMock(return_value=None)
     return response
+
+
+def mock_export_redirect(location: str = "/TRANSACTIONS_EXCEL_DOWNLOAD.aspx"):
+    """Create the redirect a usage page postback answers with."""
+    return mock_session_response(
+        url="https://myaccount-water.sfpuc.org/USE_DAILY.aspx",
+        status_code=302,
+        headers={"Location": location},
+    )
+
+
+def mock_session(get=None, post=None):
+    """Create a mock aiohttp session returning the given responses.
+
+    Args:
+        get: Response (or list of responses) returned by session.get.
+        post: Response (or list of responses) returned by session.post.
+    """
+    session = Mock()
+    session.closed = False
+    session.close = AsyncMock()
+    for name, value in (("get", get), ("post", post)):
+        if isinstance(value, list):
+            setattr(session, name, Mock(side_effect=value))
+        else:
+            setattr(session, name, Mock(return_value=value))
+    return session
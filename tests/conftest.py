@@ -20,14 +20,17 @@ def mock_scraper():
     with patch("custom_components.sfpuc.coordinator.SFPUCScraper") as mock:
         scraper = Mock()
         mock.return_value = scraper
-        scraper.login.return_value = True
-        scraper.get_usage_data.return_value = [
-            {
-                "timestamp": datetime(2023, 10, 1, 10, 0),
-                "usage": 50.0,
-                "resolution": "hourly",
-            }
-        ]
+        scraper.login = AsyncMock(return_value=True)
+        scraper.async_ensure_logged_in = AsyncMock(return_value=True)
+        scraper.get_usage_data = AsyncMock(
+            return_value=[
+                {
+                    "timestamp": datetime(2023, 10, 1, 10, 0),
+                    "usage": 50.0,
+                    "resolution": "hourly",
+                }
+            ]
+        )
         yield scraper
 
 
@@ -1,5 +1,8 @@
 """Tests for San Francisco Water Power Sewer config flow."""
 
+import asyncio
+from unittest.mock import AsyncMock, PropertyMock, patch
+
 from homeassistant.data_entry_flow import FlowResultType
 import pytest
 
@@ -30,6 +33,54 @@ class TestSFWaterConfigFlow:
         assert "username" in result["data_schema"].schema
         assert "password" in result["data_schema"].schema
 
+    @patch("custom_components.sfpuc.config_flow.LOGIN_TIMEOUT", 0.01)
+    @patch("custom_components.sfpuc.config_flow.SFPUCScraper")
+    async def test_config_flow_user_step_timeout(self, mock_scraper_class, hass):
+        """Test a portal that never answers yields a timeout error."""
+
+        async def _hang() -> bool:
+            await asyncio.sleep(1)
+            return True
+
+        mock_scraper = mock_scraper_class.return_value
+        mock_scraper.login = AsyncMock(side_effect=_hang)
+        mock_scraper.async_close = AsyncMock()
+
+        flow = ConfigFlowHandler()
+        flow.hass = hass
+
+        result = await flow.async_step_user(
+            {"username": "test@example.com", "password": "testpass"}
+        )
+
+        assert result["type"] == FlowResultType.FORM
+        assert result["errors"] == {"base": "timeout"}
+        mock_scraper.async_close.assert_awaited_once()
+
+    @patch("custom_components.sfpuc.config_flow.SFPUCScraper")
+    async def test_config_flow_user_step_uses_shared_connector(
+        self, mock_scraper_class, hass
+    ):
+        """Test validation borrows the shared connector of loaded entries."""
+        connector = object()
+        hass.data["sfpuc"] = {"connector": connector}
+        mock_scraper = mock_scraper_class.return_value
+        mock_scraper.login = AsyncMock(return_value=True)
+        mock_scraper.async_close = AsyncMock()
+
+        flow = ConfigFlowHandler()
+        flow.hass = hass
+
+        result = await flow.async_step_user(
+            {"username": "test@example.com", "password": "testpass"}
+        )
+
+        assert result["type"] == FlowResultType.CREATE_ENTRY
+        mock_scraper_class.assert_called_once_with(
+            "test@example.com", "testpass", connector
+        )
+        mock_scraper.async_close.assert_awaited_once()
+
     def test_config_flow_get_options_flow(self, hass):
         """Test getting the options flow."""
         config_entry = MockConfigEntry()
@@ -39,3 +90,42 @@ class TestSFWaterConfigFlow:
 
         # Test that it's the correct class
         assert isinstance(options_flow_class, OptionsFlowHandler)
+
+    @patch("custom_components.sfpuc.config_flow.SFPUCScraper")
+    async def test_options_flow_unchanged_credentials_skip_login(
+        self, mock_scraper_class, hass
+    ):
+        """Test resubmitting the stored credentials does not log in again."""
+        flow = OptionsFlowHandler()
+        flow.hass = hass
+
+        with patch.object(
+            OptionsFlowHandler,
+            "config_entry",
+            new_callable=PropertyMock,
+            return_value=self.config_entry,
+        ):
+            result = await flow.async_step_init(
+                {"username": "test@example.com", "password": "testpass"}
+            )
+
+        assert result["type"] == FlowResultType.CREATE_ENTRY
+        mock_scraper_class.assert_not_called()
+
+    def test_options_flow_cleared_username_keeps_stored(self, hass):
+        """Test a cleared username field falls back to the stored username."""
+        flow = OptionsFlowHandler()
+        flow.hass = hass
+
+        with patch.object(
+            OptionsFlowHandler,
+            "config_entry",
+            new_callable=PropertyMock,
+            return_value=self.config_entry,
+        ):
+            schema = flow._get_options_schema()
+
+        assert schema({"password": "testpass"}) == {
+            "username": "test@example.com",
+            "password": "testpass",
+        }
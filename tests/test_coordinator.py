@@ -1,7 +1,8 @@
 """Tests for San Francisco Water Power Sewer coordinator."""
 
-from datetime import timedelta
-from unittest.mock import AsyncMock, Mock, patch
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, PropertyMock, patch
 
 from homeassistant.helpers.update_coordinator import UpdateFailed
 import pytest
@@ -48,6 +49,24 @@ class TestSFWaterCoordinator:
         assert coordinator._historical_data_fetched is False
         assert coordinator.update_interval == timedelta(minutes=DEFAULT_UPDATE_INTERVAL)
 
+    @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
+    @pytest.mark.asyncio
+    async def test_setup_restores_last_backfill(
+        self, mock_scraper_class, hass, config_entry, hass_storage
+    ):
+        """Test the last backfill time survives a restart."""
+        hass_storage["sfpuc.test_entry"] = {
+            "version": 1,
+            "minor_version": 1,
+            "key": "sfpuc.test_entry",
+            "data": {"last_backfill": "2023-10-01T12:00:00"},
+        }
+        coordinator = SFWaterCoordinator(hass, config_entry)
+
+        await coordinator._async_setup()
+
+        assert coordinator._last_backfill_date == datetime(2023, 10, 1, 12, 0)
+
     @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
     @pytest.mark.asyncio
     async def test_update_data_success_first_run(
@@ -57,7 +76,7 @@ class TestSFWaterCoordinator:
         # Mock the scraper
         mock_scraper = Mock()
         mock_scraper_class.return_value = mock_scraper
-        mock_scraper.login.return_value = True
+        mock_scraper.async_ensure_logged_in = AsyncMock(return_value=True)
 
         coordinator = SFWaterCoordinator(hass, config_entry)
 
@@ -71,7 +90,7 @@ class TestSFWaterCoordinator:
 
         with (
             patch(
-                "homeassistant.components.recorder.get_instance"
+                "custom_components.sfpuc.coordinator.get_instance"
             ) as mock_get_instance,
             patch(
                 "custom_components.sfpuc.statistics_handler.async_add_external_statistics"
@@ -87,7 +106,7 @@ class TestSFWaterCoordinator:
             patch(
                 "custom_components.sfpuc.coordinator.async_detect_billing_day",
                 AsyncMock(),
-            ),
+            ) as mock_detect_billing_day,
             patch(
                 "homeassistant.helpers.issue_registry.async_delete_issue"
             ) as mock_delete_issue,
@@ -100,6 +119,8 @@ class TestSFWaterCoordinator:
             result = await coordinator._async_update_data()
 
         assert result["current_bill_usage"] == 140.0  # Sum of the states
+        # Billing day detection only runs alongside the historical data check
+        mock_detect_billing_day.assert_awaited_once()
         assert "last_updated" in result
         assert (
             coordinator._historical_data_fetched is False
@@ -114,6 +135,48 @@ class TestSFWaterCoordinator:
         # No direct calls to get_usage_data in _async_update_data (backfill mocked)
         assert mock_scraper.get_usage_data.call_count == 0
 
+    @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
+    @pytest.mark.asyncio
+    async def test_update_data_retries_billing_day_detection(
+        self, mock_scraper_class, hass, config_entry
+    ):
+        """Test later updates retry billing day detection until it succeeds."""
+        mock_scraper = Mock()
+        mock_scraper_class.return_value = mock_scraper
+        mock_scraper.async_ensure_logged_in = AsyncMock(return_value=True)
+
+        coordinator = SFWaterCoordinator(hass, config_entry)
+        # Startup probes already ran, before any monthly statistics existed
+        coordinator._checked_for_historical_data = True
+        coordinator._historical_data_fetched = True
+
+        async def detect_billing_day(coordinator):
+            coordinator._billing_day = 25
+
+        with (
+            patch(
+                "custom_components.sfpuc.coordinator.get_instance"
+            ) as mock_get_instance,
+            patch(
+                "custom_components.sfpuc.coordinator.async_backfill_missing_data",
+                AsyncMock(),
+            ),
+            patch(
+                "custom_components.sfpuc.coordinator.async_detect_billing_day",
+                AsyncMock(side_effect=detect_billing_day),
+            ) as mock_detect_billing_day,
+            patch("homeassistant.helpers.issue_registry.async_delete_issue"),
+        ):
+            mock_get_instance.return_value.async_add_executor_job = AsyncMock(
+                return_value={}
+            )
+            await coordinator._async_update_data()
+            await coordinator._async_update_data()
+
+        # Detected on the first of these updates, then no longer queried
+        mock_detect_billing_day.assert_awaited_once()
+        assert coordinator._billing_day == 25
+
     @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
     @pytest.mark.asyncio
     async def test_update_data_login_failure(
@@ -122,7 +185,7 @@ class TestSFWaterCoordinator:
         """Test data update with login failure."""
         mock_scraper = Mock()
         mock_scraper_class.return_value = mock_scraper
-        mock_scraper.login.return_value = False
+        mock_scraper.async_ensure_logged_in = AsyncMock(return_value=False)
 
         coordinator = SFWaterCoordinator(hass, config_entry)
 
@@ -148,8 +211,8 @@ class TestSFWaterCoordinator:
         """Test data update when no current data is available."""
         mock_scraper = Mock()
         mock_scraper_class.return_value = mock_scraper
-        mock_scraper.login.return_value = True
-        mock_scraper.get_usage_data.return_value = None
+        mock_scraper.async_ensure_logged_in = AsyncMock(return_value=True)
+        mock_scraper.get_usage_data = AsyncMock(return_value=None)
 
         coordinator = SFWaterCoordinator(hass, config_entry)
 
@@ -158,7 +221,7 @@ class TestSFWaterCoordinator:
 
         with (
             patch(
-                "homeassistant.components.recorder.get_instance"
+                "custom_components.sfpuc.coordinator.get_instance"
             ) as mock_get_instance,
             patch(
                 "custom_components.sfpuc.statistics_handler.async_add_external_statistics"
@@ -186,6 +249,138 @@ class TestSFWaterCoordinator:
         assert result["current_bill_usage"] == 0.0
         assert "last_updated" in result
 
+    @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
+    @pytest.mark.asyncio
+    async def test_update_data_skips_billing_without_entities(
+        self, mock_scraper_class, hass, config_entry
+    ):
+        """Test the billing query is skipped when only the dummy listener exists."""
+        mock_scraper = Mock()
+        mock_scraper_class.return_value = mock_scraper
+        mock_scraper.async_ensure_logged_in = AsyncMock(return_value=True)
+
+        coordinator = SFWaterCoordinator(hass, config_entry)
+        coordinator._checked_for_historical_data = True
+        coordinator._historical_data_fetched = True
+        coordinator._billing_day = 25
+        previous = {"current_bill_usage": 42.0, "last_updated": None}
+        coordinator.data = previous
+
+        with (
+            patch(
+                "custom_components.sfpuc.coordinator.get_instance"
+            ) as mock_get_instance,
+            patch(
+                "custom_components.sfpuc.coordinator.async_backfill_missing_data",
+                AsyncMock(),
+            ) as mock_backfill,
+        ):
+            result = await coordinator._async_update_data()
+
+        assert result is previous
+        # Statistics backfill still runs, only the sensor query is skipped
+        mock_backfill.assert_awaited_once()
+        mock_get_instance.assert_not_called()
+        assert coordinator._sensor_update_skipped is True
+
+    @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
+    @pytest.mark.asyncio
+    async def test_update_data_reuses_billing_usage(
+        self, mock_scraper_class, hass, config_entry
+    ):
+        """Test the billing query is only repeated after statistics were added."""
+        mock_scraper = Mock()
+        mock_scraper_class.return_value = mock_scraper
+        mock_scraper.async_ensure_logged_in = AsyncMock(return_value=True)
+
+        coordinator = SFWaterCoordinator(hass, config_entry)
+        coordinator._checked_for_historical_data = True
+        coordinator._historical_data_fetched = True
+        coordinator._billing_day = 25
+        stat_id = "sfpuc:test@example.com_water_consumption"
+
+        with (
+            patch(
+                "custom_components.sfpuc.coordinator.get_instance"
+            ) as mock_get_instance,
+            patch(
+                "custom_components.sfpuc.coordinator.async_backfill_missing_data",
+                AsyncMock(),
+            ),
+        ):
+            mock_query = AsyncMock(
+                return_value={stat_id: [{"state": 40.0}, {"state": 2.0}]}
+            )
+            mock_get_instance.return_value.async_add_executor_job = mock_query
+            first = await coordinator._async_update_data()
+            second = await coordinator._async_update_data()
+            assert mock_query.await_count == 1
+
+            coordinator._statistics_version += 1
+            third = await coordinator._async_update_data()
+
+        assert first["current_bill_usage"] == 42.0
+        assert second["current_bill_usage"] == 42.0
+        assert third["current_bill_usage"] == 42.0
+        assert mock_query.await_count == 2
+
+    @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
+    @patch("custom_components.sfpuc.coordinator._STATISTICS_QUERY_TIMEOUT", 0.01)
+    async def test_update_data_keeps_usage_on_recorder_timeout(
+        self, mock_scraper_class, hass, config_entry
+    ):
+        """Test a stalled recorder keeps the last billing period usage."""
+        mock_scraper = Mock()
+        mock_scraper_class.return_value = mock_scraper
+        mock_scraper.async_ensure_logged_in = AsyncMock(return_value=True)
+
+        coordinator = SFWaterCoordinator(hass, config_entry)
+        coordinator._checked_for_historical_data = True
+        coordinator._historical_data_fetched = True
+        coordinator._billing_day = 25
+        coordinator.data = {"current_bill_usage": 42.0}
+
+        async def _stalled(*args):
+            await asyncio.sleep(1)
+
+        with (
+            patch(
+                "custom_components.sfpuc.coordinator.get_instance"
+            ) as mock_get_instance,
+            patch(
+                "custom_components.sfpuc.coordinator.async_backfill_missing_data",
+                AsyncMock(),
+            ),
+            patch.object(
+                SFWaterCoordinator,
+                "_has_entity_listeners",
+                new_callable=PropertyMock,
+                return_value=True,
+            ),
+        ):
+            mock_get_instance.return_value.async_add_executor_job = _stalled
+            data = await coordinator._async_update_data()
+
+        assert data["current_bill_usage"] == 42.0
+
+    @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
+    async def test_add_listener_refreshes_after_skip(
+        self, mock_scraper_class, hass, config_entry
+    ):
+        """Test a new entity listener triggers a refresh after a skipped update."""
+        coordinator = SFWaterCoordinator(hass, config_entry)
+        coordinator._sensor_update_skipped = True
+
+        with patch.object(
+            coordinator, "async_request_refresh", AsyncMock()
+        ) as mock_refresh:
+            remove = coordinator.async_add_listener(Mock())
+            await hass.async_block_till_done()
+
+        mock_refresh.assert_awaited_once()
+        assert coordinator._sensor_update_skipped is False
+        remove()
+
     @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
     @pytest.mark.asyncio
     async def test_insert_statistics_success(
@@ -198,7 +393,7 @@ class TestSFWaterCoordinator:
         coordinator = SFWaterCoordinator(hass, config_entry)
 
         with patch(
-            "homeassistant.components.recorder.get_instance"
+            "custom_components.sfpuc.coordinator.get_instance"
         ) as mock_get_instance:
             mock_recorder = Mock()
             mock_recorder.async_add_executor_job = AsyncMock(return_value=[])
@@ -224,7 +419,7 @@ class TestSFWaterCoordinator:
         coordinator = SFWaterCoordinator(hass, config_entry)
 
         with patch(
-            "homeassistant.components.recorder.get_instance"
+            "custom_components.sfpuc.coordinator.get_instance"
         ) as mock_get_instance:
             mock_get_instance.side_effect = Exception("Recorder error")
 
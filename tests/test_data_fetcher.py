@@ -1,5 +1,6 @@
 """Tests for SFPUC data fetching operations."""
 
+import asyncio
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, Mock, patch
 
@@ -7,7 +8,10 @@ import pytest
 
 from custom_components.sfpuc.coordinator import SFWaterCoordinator
 from custom_components.sfpuc.data_fetcher import (
+    _async_fetch_hourly_days,
     async_backfill_missing_data,
+    async_background_historical_fetch,
+    async_check_has_historical_data,
     async_fetch_historical_data,
 )
 
@@ -21,6 +25,31 @@ def mock_asyncio_sleep():
         yield mock_sleep
 
 
+def _usage_by_resolution(**responses):
+    """Build a get_usage_data side effect that answers per resolution.
+
+    Each resolution maps to a list of results returned (or raised) in turn;
+    once a list runs out, further requests for that resolution get no data.
+    """
+    queues = {resolution: list(results) for resolution, results in responses.items()}
+
+    async def get_usage_data(start_date, end_date, resolution):
+        queue = queues.get(resolution)
+        if not queue:
+            return []
+        result = queue.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return get_usage_data
+
+
+def _inserted_by_resolution(mock_insert_stats) -> dict:
+    """Map each resolution passed to async_insert_statistics to its data."""
+    return {call[0][2]: call[0][1] for call in mock_insert_stats.call_args_list}
+
+
 class TestDataFetcher:
     """Test the SFPUC data fetching functionality."""
 
@@ -58,21 +87,15 @@ class TestDataFetcher:
         """Test successful historical data fetching."""
         mock_scraper = Mock()
         mock_scraper_class.return_value = mock_scraper
-        mock_scraper.get_usage_data = Mock(
-            side_effect=[
-                # Monthly data
-                [
-                    {
-                        "timestamp": datetime(2023, 9, 15),
-                        "usage": 150.0,
-                        "resolution": "monthly",
-                    }
-                ],
-                # Daily data - empty to end loop
-                [],
-                # Hourly data - empty to end loop
-                [],
-            ]
+        monthly_data = [
+            {
+                "timestamp": datetime(2023, 9, 15),
+                "usage": 150.0,
+                "resolution": "monthly",
+            }
+        ]
+        mock_scraper.get_usage_data = AsyncMock(
+            side_effect=_usage_by_resolution(monthly=[monthly_data])
         )
 
         coordinator = SFWaterCoordinator(hass, config_entry)
@@ -89,7 +112,8 @@ class TestDataFetcher:
         ):
             await async_fetch_historical_data(coordinator)
 
-        assert mock_insert_stats.call_count >= 1
+        # Only the monthly export had data, and it was inserted as monthly
+        assert _inserted_by_resolution(mock_insert_stats) == {"monthly": monthly_data}
 
     @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
     @patch("custom_components.sfpuc.coordinator._LOGGER")
@@ -100,7 +124,7 @@ class TestDataFetcher:
         """Test historical data fetching with failures."""
         mock_scraper = Mock()
         mock_scraper_class.return_value = mock_scraper
-        mock_scraper.get_usage_data.side_effect = Exception("Network error")
+        mock_scraper.get_usage_data = AsyncMock(side_effect=Exception("Network error"))
 
         coordinator = SFWaterCoordinator(hass, config_entry)
 
@@ -118,7 +142,7 @@ class TestDataFetcher:
         """Test backfilling is skipped when no data exists (first run)."""
         mock_scraper = Mock()
         mock_scraper_class.return_value = mock_scraper
-        mock_scraper.get_usage_data.return_value = []
+        mock_scraper.get_usage_data = AsyncMock(return_value=[])
 
         coordinator = SFWaterCoordinator(hass, config_entry)
 
@@ -154,72 +178,32 @@ class TestDataFetcher:
         """Test retry logic for daily data fetching with transient failures."""
         mock_scraper = Mock()
         mock_scraper_class.return_value = mock_scraper
+        daily_data = [
+            {
+                "timestamp": datetime(2023, 9, 25),
+                "usage": 140.0,
+                "resolution": "daily",
+            }
+        ]
 
-        # First call fails, second succeeds (simulating transient failure)
-        mock_scraper.get_usage_data = Mock(
-            side_effect=[
-                # Monthly data
-                [
-                    {
-                        "timestamp": datetime(2023, 9, 15),
-                        "usage": 150.0,
-                        "resolution": "monthly",
-                    }
-                ],
-                # Daily data - 1st attempt fails, 2nd succeeds
-                Exception("Network error"),
-                [
-                    {
-                        "timestamp": datetime(2023, 9, 25),
-                        "usage": 140.0,
-                        "resolution": "daily",
-                    }
-                ],
-                # Hourly data - empty to end loop
-                [],
-            ]
-        )
-
-        coordinator = SFWaterCoordinator(hass, config_entry)
-
-        with (
-            patch(
-                "custom_components.sfpuc.data_fetcher.async_check_has_historical_data",
-                return_value=False,
-            ),
-            patch(
-                "custom_components.sfpuc.data_fetcher.async_insert_statistics",
-                new_callable=AsyncMock,
-            ) as mock_insert_stats,
-        ):
-            await async_fetch_historical_data(coordinator)
-        """Test retry logic for daily data fetching with transient failures."""
-        mock_scraper = Mock()
-        mock_scraper_class.return_value = mock_scraper
-
-        # First call fails, second succeeds (simulating transient failure)
-        mock_scraper.get_usage_data = Mock(
-            side_effect=[
-                # Monthly data
-                [
-                    {
-                        "timestamp": datetime(2023, 9, 15),
-                        "usage": 150.0,
-                        "resolution": "monthly",
-                    }
+        # The year-long window fails; its first chunk fails once, then succeeds
+        mock_scraper.get_usage_data = AsyncMock(
+            side_effect=_usage_by_resolution(
+                monthly=[
+                    [
+                        {
+                            "timestamp": datetime(2023, 9, 15),
+                            "usage": 150.0,
+                            "resolution": "monthly",
+                        }
+                    ]
                 ],
-                # Daily data - 1st attempt fails, 2nd succeeds
-                Exception("Network error"),
-                [
-                    {
-                        "timestamp": datetime(2023, 9, 25),
-                        "usage": 140.0,
-                        "resolution": "daily",
-                    }
+                daily=[
+                    Exception("Window too large"),
+                    Exception("Network error"),
+                    daily_data,
                 ],
-                # Hourly data
-                [],
-            ]
+            )
         )
 
         coordinator = SFWaterCoordinator(hass, config_entry)
@@ -236,9 +220,10 @@ class TestDataFetcher:
         ):
             await async_fetch_historical_data(coordinator)
 
-        # Should retry and eventually succeed
-        assert mock_insert_stats.call_count >= 1
-        assert mock_scraper.get_usage_data.call_count >= 3
+        # Should retry and eventually insert the daily data as daily
+        inserted = _inserted_by_resolution(mock_insert_stats)
+        assert inserted["daily"] == daily_data
+        assert inserted["monthly"][0]["resolution"] == "monthly"
 
     @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
     @pytest.mark.asyncio
@@ -248,31 +233,28 @@ class TestDataFetcher:
         """Test retry logic for hourly data fetching with transient failures."""
         mock_scraper = Mock()
         mock_scraper_class.return_value = mock_scraper
+        hourly_data = [
+            {
+                "timestamp": datetime(2023, 9, 30, 15, 0),
+                "usage": 25.0,
+                "resolution": "hourly",
+            }
+        ]
 
-        # Monthly and daily succeed, hourly fails then succeeds
-        mock_scraper.get_usage_data = Mock(
-            side_effect=[
-                # Monthly data
-                [
-                    {
-                        "timestamp": datetime(2023, 9, 15),
-                        "usage": 150.0,
-                        "resolution": "monthly",
-                    }
-                ],
-                # Daily data
-                [],
-                # Hourly data - 1st attempt fails
-                Exception("Timeout"),
-                # Hourly data - 2nd attempt succeeds
-                [
-                    {
-                        "timestamp": datetime(2023, 9, 30, 15, 0),
-                        "usage": 25.0,
-                        "resolution": "hourly",
-                    }
+        # Monthly succeeds, the first hourly day fails once, then succeeds
+        mock_scraper.get_usage_data = AsyncMock(
+            side_effect=_usage_by_resolution(
+                monthly=[
+                    [
+                        {
+                            "timestamp": datetime(2023, 9, 15),
+                            "usage": 150.0,
+                            "resolution": "monthly",
+                        }
+                    ]
                 ],
-            ]
+                hourly=[Exception("Timeout"), hourly_data],
+            )
         )
 
         coordinator = SFWaterCoordinator(hass, config_entry)
@@ -285,12 +267,18 @@ class TestDataFetcher:
             patch(
                 "custom_components.sfpuc.data_fetcher.async_insert_statistics",
                 new_callable=AsyncMock,
-            ),
+            ) as mock_insert_stats,
         ):
             await async_fetch_historical_data(coordinator)
 
-        # Should have retried hourly data
-        assert mock_scraper.get_usage_data.call_count >= 3
+        # Should have retried the hourly day and inserted its data as hourly
+        assert _inserted_by_resolution(mock_insert_stats)["hourly"] == hourly_data
+        hourly_calls = [
+            call
+            for call in mock_scraper.get_usage_data.call_args_list
+            if call[0][2] == "hourly"
+        ]
+        assert hourly_calls[0] == hourly_calls[1]
 
     @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
     @pytest.mark.asyncio
@@ -302,7 +290,7 @@ class TestDataFetcher:
         mock_scraper_class.return_value = mock_scraper
 
         # Simulate network failure
-        mock_scraper.get_usage_data = Mock(side_effect=Exception("Network error"))
+        mock_scraper.get_usage_data = AsyncMock(side_effect=Exception("Network error"))
 
         coordinator = SFWaterCoordinator(hass, config_entry)
 
@@ -322,7 +310,9 @@ class TestDataFetcher:
         mock_scraper_class.return_value = mock_scraper
 
         # All calls fail
-        mock_scraper.get_usage_data = Mock(side_effect=Exception("Data unavailable"))
+        mock_scraper.get_usage_data = AsyncMock(
+            side_effect=Exception("Data unavailable")
+        )
 
         coordinator = SFWaterCoordinator(hass, config_entry)
 
@@ -410,7 +400,7 @@ class TestDataFetcher:
                 return []
             return []
 
-        mock_scraper.get_usage_data = Mock(side_effect=get_usage_data_side_effect)
+        mock_scraper.get_usage_data = AsyncMock(side_effect=get_usage_data_side_effect)
 
         coordinator = SFWaterCoordinator(hass, config_entry)
 
@@ -455,7 +445,7 @@ class TestDataFetcher:
                 hourly_dates_requested.append((start.date(), end.date()))
             return []
 
-        mock_scraper.get_usage_data = Mock(side_effect=get_usage_data_side_effect)
+        mock_scraper.get_usage_data = AsyncMock(side_effect=get_usage_data_side_effect)
 
         coordinator = SFWaterCoordinator(hass, config_entry)
 
@@ -484,3 +474,144 @@ class TestDataFetcher:
 
         # The hourly data should start from 32 days back to overlap with daily
         assert earliest_hourly_date == expected_earliest
+
+    @pytest.mark.asyncio
+    async def test_check_has_historical_data_daily_rows(self, hass, config_entry):
+        """Test the historical check counts the days that have statistics."""
+        coordinator = SFWaterCoordinator(hass, config_entry)
+        stat_id = "sfpuc:test@example.com_water_consumption"
+
+        with patch(
+            "custom_components.sfpuc.data_fetcher.get_instance"
+        ) as mock_get_instance:
+            mock_get_instance.return_value.async_add_executor_job = AsyncMock(
+                return_value={stat_id: [{"sum": float(i)} for i in range(330)]}
+            )
+            result = await async_check_has_historical_data(coordinator)
+
+        assert result is True
+        call_args = mock_get_instance.return_value.async_add_executor_job.call_args
+        assert call_args[0][5] == "day"
+
+    @pytest.mark.asyncio
+    async def test_check_has_historical_data_monthly_only(self, hass, config_entry):
+        """Test monthly billing rows alone don't count as historical data."""
+        coordinator = SFWaterCoordinator(hass, config_entry)
+        stat_id = "sfpuc:test@example.com_water_consumption"
+
+        with patch(
+            "custom_components.sfpuc.data_fetcher.get_instance"
+        ) as mock_get_instance:
+            # A year of monthly billing rows plus a month of hourly data
+            mock_get_instance.return_value.async_add_executor_job = AsyncMock(
+                return_value={stat_id: [{"sum": float(i)} for i in range(12 + 32)]}
+            )
+            result = await async_check_has_historical_data(coordinator)
+
+        assert result is False
+
+    @pytest.mark.asyncio
+    async def test_fetch_hourly_days_one_at_a_time(self, mock_asyncio_sleep):
+        """Test hourly days are downloaded in turn, in date order."""
+        coordinator = Mock()
+        in_flight = 0
+        max_in_flight = 0
+
+        async def get_usage_data(start, end, resolution):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return [{"timestamp": start, "usage": 1.0, "resolution": resolution}]
+
+        coordinator.scraper.get_usage_data = AsyncMock(side_effect=get_usage_data)
+        fetch_dates = [datetime(2023, 10, day) for day in range(1, 11)]
+
+        result = await _async_fetch_hourly_days(coordinator, fetch_dates)
+
+        assert [item["timestamp"] for item in result] == fetch_dates
+        assert max_in_flight == 1
+
+    @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
+    @pytest.mark.asyncio
+    async def test_fetch_historical_data_daily_whole_windows(
+        self, mock_scraper_class, hass, config_entry, mock_asyncio_sleep
+    ):
+        """Test daily history is fetched as year-long windows when allowed."""
+        mock_scraper = Mock()
+        mock_scraper_class.return_value = mock_scraper
+        daily_requests = []
+
+        def get_usage_data_side_effect(start, end, resolution):
+            if resolution != "daily":
+                return []
+            daily_requests.append((start, end))
+            return [
+                {"timestamp": start, "usage": 1.0, "resolution": "daily"},
+                {"timestamp": end, "usage": 1.0, "resolution": "daily"},
+            ]
+
+        mock_scraper.get_usage_data = AsyncMock(side_effect=get_usage_data_side_effect)
+
+        coordinator = SFWaterCoordinator(hass, config_entry)
+
+        with patch(
+            "custom_components.sfpuc.data_fetcher.async_insert_statistics",
+            new_callable=AsyncMock,
+        ):
+            await async_fetch_historical_data(coordinator)
+
+        # Two years ending 31 days ago fit in two windows of under a year
+        assert len(daily_requests) == 2
+        assert all(end - start < timedelta(days=365) for start, end in daily_requests)
+
+    @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
+    @pytest.mark.asyncio
+    async def test_background_fetch_starts_once_running(
+        self, mock_scraper_class, hass, config_entry
+    ):
+        """Test the background fetch starts at once when HA is already running."""
+        coordinator = SFWaterCoordinator(hass, config_entry)
+
+        with patch(
+            "custom_components.sfpuc.data_fetcher.async_fetch_historical_data",
+            new_callable=AsyncMock,
+        ) as mock_fetch:
+            await asyncio.wait_for(
+                async_background_historical_fetch(coordinator), timeout=1
+            )
+
+        mock_fetch.assert_awaited_once_with(coordinator)
+        assert coordinator._historical_data_fetched is True
+
+    @patch("custom_components.sfpuc.coordinator.SFPUCScraper")
+    @pytest.mark.asyncio
+    async def test_background_fetch_drops_start_listener(
+        self, mock_scraper_class, hass, config_entry
+    ):
+        """Test the start listener is released on unload and on cancellation."""
+        coordinator = SFWaterCoordinator(hass, config_entry)
+        unsub_started = Mock()
+
+        with (
+            patch(
+                "custom_components.sfpuc.data_fetcher.async_at_started",
+                return_value=unsub_started,
+            ),
+            patch(
+                "custom_components.sfpuc.data_fetcher.async_fetch_historical_data",
+                new_callable=AsyncMock,
+            ) as mock_fetch,
+        ):
+            # Home Assistant never finishes starting while the task waits
+            task = asyncio.ensure_future(async_background_historical_fetch(coordinator))
+            await asyncio.sleep(0)
+            assert unsub_started in config_entry.on_unload_callbacks
+
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        unsub_started.assert_called_once()
+        mock_fetch.assert_not_awaited()
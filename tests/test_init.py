@@ -2,9 +2,16 @@
 
 from unittest.mock import AsyncMock, Mock, patch
 
+import aiohttp
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 import pytest
 
 from custom_components.sfpuc import async_setup_entry, async_unload_entry
+from custom_components.sfpuc.const import (
+    DATA_CONNECTOR,
+    DATA_CONNECTOR_STOP,
+    DOMAIN,
+)
 
 from .common import MockConfigEntry
 
@@ -42,6 +49,31 @@ class TestSFWaterIntegration:
             mock_coordinator.async_config_entry_first_refresh.assert_called_once()
             # Verify platforms were forwarded
             mock_forward.assert_called_once_with(config_entry, ["sensor"])
+            # Verify the shared connector was created
+            connector = hass.data[DOMAIN][DATA_CONNECTOR]
+            assert isinstance(connector, aiohttp.TCPConnector)
+            await connector.close()
+
+    @patch("custom_components.sfpuc.SFWaterCoordinator")
+    async def test_async_setup_entry_closes_connector_on_stop(
+        self, mock_coordinator_class, hass, config_entry
+    ):
+        """Test the shared connector is closed when Home Assistant stops."""
+        mock_coordinator_class.return_value.async_config_entry_first_refresh = (
+            AsyncMock()
+        )
+
+        with patch(
+            "homeassistant.config_entries.ConfigEntries.async_forward_entry_setups",
+            return_value=None,
+        ):
+            await async_setup_entry(hass, config_entry)
+
+        connector = hass.data[DOMAIN][DATA_CONNECTOR]
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+        await hass.async_block_till_done()
+
+        assert connector.closed
 
     @patch("custom_components.sfpuc.SFWaterCoordinator")
     async def test_async_setup_entry_coordinator_refresh_failure(
@@ -104,3 +136,25 @@ class TestSFWaterIntegration:
 
             assert result is False
             mock_unload.assert_called_once_with(config_entry, ["sensor"])
+
+    async def test_async_unload_entry_closes_shared_connector(self, hass, config_entry):
+        """Test the shared connector is closed when the last entry unloads."""
+        connector = Mock()
+        connector.close = AsyncMock()
+        remove_stop_listener = Mock()
+        hass.data[DOMAIN] = {
+            DATA_CONNECTOR: connector,
+            DATA_CONNECTOR_STOP: remove_stop_listener,
+        }
+        config_entry.runtime_data = Mock()
+
+        with patch(
+            "homeassistant.config_entries.ConfigEntries.async_unload_platforms",
+            return_value=True,
+        ):
+            result = await async_unload_entry(hass, config_entry)
+
+        assert result is True
+        connector.close.assert_awaited_once()
+        remove_stop_listener.assert_called_once()
+        assert DATA_CONNECTOR not in hass.data[DOMAIN]
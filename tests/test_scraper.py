@@ -1,10 +1,15 @@
 """Tests for San Francisco Water Power Sewer integration."""
 
+import asyncio
 from datetime import datetime
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
 
 from custom_components.sfpuc.coordinator import SFPUCScraper
 
+from .common import mock_export_redirect, mock_session, mock_session_response
+
 
 class TestSFPUCScraper:
     """Test the SFPUC scraper functionality."""
@@ -15,102 +20,230 @@ class TestSFPUCScraper:
         self.password = "testpass"
         self.scraper = SFPUCScraper(self.username, self.password)
 
-    @patch("requests.Session.get")
-    @patch("requests.Session.post")
-    def test_login_success(self, mock_post, mock_get):
+    async def test_login_success(self):
         """Test successful login."""
         # Mock the login page response
-        login_page = Mock()
-        login_page.status_code = 200
-        login_page.content = b"""
+        login_page = mock_session_response(b"""
         <html>
             <form>
                 <input name="__VIEWSTATE" value="test_viewstate" />
                 <input name="__EVENTVALIDATION" value="test_validation" />
             </form>
         </html>
-        """
-        mock_get.return_value = login_page
+        """)
 
         # Mock the login POST response
-        login_response = Mock()
-        login_response.status_code = 200
-        login_response.url = "https://myaccount-water.sfpuc.org/MY_ACCOUNT_RSF.aspx"
-        login_response.text = "Welcome to your account"
-        mock_post.return_value = login_response
+        login_response = mock_session_response(
+            "Welcome to your account",
+            url="https://myaccount-water.sfpuc.org/MY_ACCOUNT_RSF.aspx",
+        )
+        self.scraper.session = mock_session(get=login_page, post=login_response)
 
-        result = self.scraper.login()
+        result = await self.scraper.login()
         assert result is True
 
         # Verify login was called with correct data
-        mock_post.assert_called_once()
-        call_args = mock_post.call_args
+        self.scraper.session.post.assert_called_once()
+        call_args = self.scraper.session.post.call_args
         assert call_args[1]["data"]["tb_USER_ID"] == self.username
         assert call_args[1]["data"]["tb_USER_PSWD"] == self.password
 
-    @patch("requests.Session.get")
-    def test_login_failure_no_form(self, mock_get):
+    async def test_login_extracts_aspnet_hidden_fields(self):
+        """Test login picks up hidden fields as rendered by ASP.NET."""
+        login_page = mock_session_response(b"""
+        <form method="post" action="./" id="form1">
+            <input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="dkX+/w==" />
+            <input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="CA0B0334" />
+            <input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="a&amp;b" />
+        </form>
+        """)
+        login_response = mock_session_response(
+            "Welcome to your account",
+            url="https://myaccount-water.sfpuc.org/MY_ACCOUNT_RSF.aspx",
+        )
+        self.scraper.session = mock_session(get=login_page, post=login_response)
+
+        assert await self.scraper.login() is True
+
+        data = self.scraper.session.post.call_args[1]["data"]
+        assert data["__VIEWSTATE"] == "dkX+/w=="
+        assert data["__VIEWSTATEGENERATOR"] == "CA0B0334"
+        assert data["__EVENTVALIDATION"] == "a&b"
+
+    async def test_concurrent_logins_share_one_request(self):
+        """Test overlapping login calls reuse the in-flight login."""
+        login_page = mock_session_response(
+            b'<input name="__VIEWSTATE" value="vs" />'
+            b'<input name="__EVENTVALIDATION" value="ev" />'
+        )
+
+        async def _slow_read() -> bytes:
+            await asyncio.sleep(0)
+            return login_page.read.return_value
+
+        login_page.read.side_effect = _slow_read
+        login_response = mock_session_response(
+            "Welcome to your account",
+            url="https://myaccount-water.sfpuc.org/MY_ACCOUNT_RSF.aspx",
+        )
+        self.scraper.session = mock_session(get=login_page, post=login_response)
+
+        results = await asyncio.gather(self.scraper.login(), self.scraper.login())
+
+        assert results == [True, True]
+        assert self.scraper.session.get.call_count == 1
+        assert self.scraper.session.post.call_count == 1
+        assert self.scraper._login_future is None
+
+    async def test_concurrent_login_waiter_released_on_error(self):
+        """Test a login that raises still releases the callers waiting on it."""
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def _failing_login() -> bool:
+            started.set()
+            await release.wait()
+            raise RuntimeError("Session is closed")
+
+        with patch.object(SFPUCScraper, "_async_login", side_effect=_failing_login):
+            first = asyncio.ensure_future(self.scraper.login())
+            await started.wait()
+            waiter = asyncio.ensure_future(self.scraper.login())
+            await asyncio.sleep(0)
+            release.set()
+            results = await asyncio.wait_for(
+                asyncio.gather(first, waiter, return_exceptions=True), timeout=1
+            )
+
+        assert isinstance(results[0], RuntimeError)
+        assert results[1] is False
+        assert self.scraper._login_future is None
+
+    @patch("asyncio.sleep", new_callable=AsyncMock)
+    async def test_login_failure_no_form(self, mock_sleep):
         """Test login failure when form is not found."""
-        login_page = Mock()
-        login_page.content = b"<html><body>No form here</body></html>"
-        mock_get.return_value = login_page
+        login_page = mock_session_response(b"<html><body>No form here</body></html>")
+        self.scraper.session = mock_session(get=login_page)
 
-        result = self.scraper.login()
+        result = await self.scraper.login()
         assert result is False
 
-    @patch("requests.Session.get")
-    @patch("requests.Session.post")
-    def test_login_failure_invalid_credentials(self, mock_post, mock_get):
+    async def test_login_failure_invalid_credentials(self):
         """Test login failure with invalid credentials."""
         # Mock the login page response
-        login_page = Mock()
-        login_page.content = b"""
+        login_page = mock_session_response(b"""
         <html>
             <form>
                 <input name="__VIEWSTATE" value="test_viewstate" />
                 <input name="__EVENTVALIDATION" value="test_validation" />
             </form>
         </html>
-        """
-        mock_get.return_value = login_page
+        """)
 
         # Mock the login POST response (redirected back to login)
-        login_response = Mock()
-        login_response.url = "https://myaccount-water.sfpuc.org/"
-        login_response.text = "Invalid credentials"
-        mock_post.return_value = login_response
+        login_response = mock_session_response(
+            "Invalid credentials", url="https://myaccount-water.sfpuc.org/"
+        )
+        self.scraper.session = mock_session(get=login_page, post=login_response)
 
-        result = self.scraper.login()
+        result = await self.scraper.login()
         assert result is False
 
-    @patch("requests.Session.get")
-    @patch("requests.Session.post")
-    def test_get_usage_data_hourly_success(self, mock_post, mock_get):
+    @patch("asyncio.sleep", new_callable=AsyncMock)
+    async def test_login_network_error(self, mock_sleep):
+        """Test login returns False after repeated network errors."""
+        self.scraper.session = mock_session()
+        self.scraper.session.get.side_effect = aiohttp.ClientConnectionError("boom")
+
+        result = await self.scraper.login()
+        assert result is False
+        assert self.scraper.session.get.call_count == 3
+
+    async def test_get_usage_data_network_error(self):
+        """Test a network error loading the usage page returns None."""
+        self.scraper.session = mock_session()
+        self.scraper.session.get.side_effect = aiohttp.ClientConnectionError("boom")
+        self.scraper._logged_in = True
+
+        result = await self.scraper.get_usage_data(datetime(2023, 10, 1))
+        assert result is None
+
+    async def test_async_close(self):
+        """Test closing the scraper session."""
+        session = mock_session()
+        self.scraper.session = session
+
+        await self.scraper.async_close()
+
+        session.close.assert_awaited_once()
+        assert self.scraper.session is None
+
+    async def test_shared_connector_is_not_closed(self):
+        """Test the scraper session leaves a shared connector open."""
+        connector = aiohttp.TCPConnector()
+        scraper = SFPUCScraper(self.username, self.password, connector)
+
+        session = await scraper._ensure_session()
+        assert session.connector is connector
+
+        await scraper.async_close()
+        assert not connector.closed
+        await connector.close()
+
+    async def test_get_usage_data_extracts_form_tokens(self):
+        """Test every named input is posted back regardless of attribute order."""
+        usage_page = mock_session_response(b"""
+        <form>
+            <input type="hidden" name="__VIEWSTATE" value="a&amp;b" />
+            <INPUT value="late" type="text" name="reversed">
+            <input type="checkbox" name="no_value" />
+            <input type="submit" value="unnamed" />
+        </form>
+        """)
+        download_response = mock_session_response(
+            b"Date\tUsage\n7 AM\t50.5\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
+        )
+        self.scraper.session = mock_session(
+            get=[usage_page, download_response], post=mock_export_redirect()
+        )
+        self.scraper._logged_in = True
+        day = datetime(2023, 10, 1)
+
+        await self.scraper.get_usage_data(day, day, "hourly")
+
+        data = self.scraper.session.post.call_args[1]["data"]
+        assert data["__VIEWSTATE"] == "a&b"
+        assert data["reversed"] == "late"
+        assert data["no_value"] == ""
+        assert "unnamed" not in data.values()
+
+    async def test_get_usage_data_hourly_success(self):
         """Test successful hourly usage data retrieval."""
         # Mock the usage page response
-        usage_page = Mock()
-        usage_page.content = b"""
+        usage_page = mock_session_response(b"""
         <html>
             <form>
                 <input name="token1" value="value1" />
                 <input name="token2" value="value2" />
             </form>
         </html>
-        """
-        mock_get.return_value = usage_page
+        """)
 
         # Mock the download response with Excel data
-        download_response = Mock()
-        download_response.url = (
-            "https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx"
+        download_response = mock_session_response(
+            b"Date\tUsage\n7 AM\t50.5\n8 AM\t45.2\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
         )
-        download_response.content = b"Date\tUsage\n7 AM\t50.5\n8 AM\t45.2\n"
-        mock_post.return_value = download_response
+        self.scraper.session = mock_session(
+            get=[usage_page, download_response], post=mock_export_redirect()
+        )
+        self.scraper._logged_in = True
 
         start_date = datetime(2023, 10, 1)
         end_date = datetime(2023, 10, 1)
 
-        result = self.scraper.get_usage_data(start_date, end_date, "hourly")
+        result = await self.scraper.get_usage_data(start_date, end_date, "hourly")
 
         assert result is not None
         assert len(result) == 2
@@ -126,33 +259,141 @@ class TestSFPUCScraper:
         )
         assert result[1]["usage"] == 45.2
 
-    @patch("requests.Session.get")
-    @patch("requests.Session.post")
-    def test_get_usage_data_daily_success(self, mock_post, mock_get):
+    async def test_concurrent_usage_requests_do_not_interleave(self):
+        """Test overlapping fetches run their postback and download in turn."""
+        download_url = (
+            "https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx"
+        )
+        requests = []
+
+        def _page(url, **kwargs):
+            requests.append(("GET", url))
+            if url == download_url:
+                return mock_session_response(
+                    b"Date\tUsage\n10/01\t150.5\n", url=download_url
+                )
+            page = mock_session_response(b'<input name="t" value="v" />', url=url)
+
+            async def _slow_read() -> bytes:
+                await asyncio.sleep(0)
+                return b'<input name="t" value="v" />'
+
+            page.read.side_effect = _slow_read
+            return page
+
+        def _postback(url, **kwargs):
+            requests.append(("POST", url))
+            return mock_export_redirect()
+
+        self.scraper.session = mock_session()
+        self.scraper.session.get.side_effect = _page
+        self.scraper.session.post.side_effect = _postback
+        self.scraper._logged_in = True
+        day = datetime(2023, 10, 1)
+
+        await asyncio.gather(
+            self.scraper.get_usage_data(day, day, "daily"),
+            self.scraper.get_usage_data(day, day, "monthly"),
+        )
+
+        daily_url = "https://myaccount-water.sfpuc.org/USE_DAILY.aspx"
+        billed_url = "https://myaccount-water.sfpuc.org/USE_BILLED.aspx"
+        assert requests == [
+            ("GET", daily_url),
+            ("POST", daily_url),
+            ("GET", download_url),
+            ("GET", billed_url),
+            ("POST", billed_url),
+            ("GET", download_url),
+        ]
+
+    async def test_get_usage_data_not_modified_uses_cache(self):
+        """Test an unchanged export is revalidated and served from cache."""
+        usage_page = b'<form><input name="token1" value="value1" /></form>'
+        download_url = (
+            "https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx"
+        )
+        self.scraper.session = mock_session(
+            get=[
+                mock_session_response(usage_page),
+                mock_session_response(
+                    b"Date\tUsage\n7 AM\t50.5\n",
+                    url=download_url,
+                    headers={"ETag": '"abc"'},
+                ),
+                mock_session_response(url=download_url, status_code=304),
+            ],
+            post=mock_export_redirect(),
+        )
+        self.scraper._logged_in = True
+        day = datetime(2023, 10, 1)
+
+        first = await self.scraper.get_usage_data(day, day, "hourly")
+        second = await self.scraper.get_usage_data(day, day, "hourly")
+
+        assert second == first
+        assert len(second) == 1
+        # Each postback is plain; only the GET of the export it redirects to
+        # carries the validators of the previous download
+        for post_call in self.scraper.session.post.call_args_list:
+            assert post_call[1]["allow_redirects"] is False
+            assert "headers" not in post_call[1]
+        _, first_download, second_download = self.scraper.session.get.call_args_list
+        assert first_download[0][0] == download_url
+        assert first_download[1]["headers"] is None
+        assert second_download[0][0] == download_url
+        assert second_download[1]["headers"] == {"If-None-Match": '"abc"'}
+
+    @patch("asyncio.sleep", new_callable=AsyncMock)
+    async def test_get_usage_data_retries_server_error(self, mock_sleep):
+        """Test a transient server error on the usage page is retried."""
+        usage_page = b'<form><input name="token1" value="value1" /></form>'
+        self.scraper.session = mock_session(
+            get=[
+                mock_session_response(status_code=503),
+                mock_session_response(usage_page),
+                mock_session_response(
+                    b"Date\tUsage\n7 AM\t50.5\n",
+                    url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
+                ),
+            ],
+            post=mock_export_redirect(),
+        )
+        self.scraper._logged_in = True
+        day = datetime(2023, 10, 1)
+
+        result = await self.scraper.get_usage_data(day, day, "hourly")
+
+        assert len(result) == 1
+        assert self.scraper.session.get.call_count == 3
+        assert self.scraper.session.post.call_args[1]["data"]["token1"] == "value1"
+        mock_sleep.assert_awaited_once()
+
+    async def test_get_usage_data_daily_success(self):
         """Test successful daily usage data retrieval."""
         # Mock the usage page response
-        usage_page = Mock()
-        usage_page.content = b"""
+        usage_page = mock_session_response(b"""
         <html>
             <form>
                 <input name="token1" value="value1" />
             </form>
         </html>
-        """
-        mock_get.return_value = usage_page
+        """)
 
         # Mock the download response
-        download_response = Mock()
-        download_response.url = (
-            "https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx"
+        download_response = mock_session_response(
+            b"Date\tUsage\n10/01\t150.5\n10/02\t145.2\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
         )
-        download_response.content = b"Date\tUsage\n10/01\t150.5\n10/02\t145.2\n"
-        mock_post.return_value = download_response
+        self.scraper.session = mock_session(
+            get=[usage_page, download_response], post=mock_export_redirect()
+        )
+        self.scraper._logged_in = True
 
         start_date = datetime(2023, 10, 1)
         end_date = datetime(2023, 10, 2)
 
-        result = self.scraper.get_usage_data(start_date, end_date, "daily")
+        result = await self.scraper.get_usage_data(start_date, end_date, "daily")
 
         assert result is not None
         assert len(result) == 2
@@ -163,33 +404,31 @@ class TestSFPUCScraper:
         assert result[1]["timestamp"] == datetime(2023, 10, 2)
         assert result[1]["usage"] == 145.2
 
-    @patch("requests.Session.get")
-    @patch("requests.Session.post")
-    def test_get_usage_data_monthly_success(self, mock_post, mock_get):
+    async def test_get_usage_data_monthly_success(self):
         """Test successful monthly usage data retrieval."""
         # Mock the usage page response
-        usage_page = Mock()
-        usage_page.content = b"""
+        usage_page = mock_session_response(b"""
         <html>
             <form>
                 <input name="token1" value="value1" />
             </form>
         </html>
-        """
-        mock_get.return_value = usage_page
+        """)
 
         # Mock the download response
-        download_response = Mock()
-        download_response.url = (
-            "https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx"
+        download_response = mock_session_response(
+            b"Date\tUsage\nOct 23\t4500.5\nNov 23\t4200.2\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
+        )
+        self.scraper.session = mock_session(
+            get=[usage_page, download_response], post=mock_export_redirect()
         )
-        download_response.content = b"Date\tUsage\nOct 23\t4500.5\nNov 23\t4200.2\n"
-        mock_post.return_value = download_response
+        self.scraper._logged_in = True
 
         start_date = datetime(2023, 10, 1)
         end_date = datetime(2023, 11, 1)
 
-        result = self.scraper.get_usage_data(start_date, end_date, "monthly")
+        result = await self.scraper.get_usage_data(start_date, end_date, "monthly")
 
         assert result is not None
         assert len(result) == 2
@@ -200,106 +439,105 @@ class TestSFPUCScraper:
         assert result[1]["timestamp"] == datetime(2023, 11, 1)
         assert result[1]["usage"] == 4200.2
 
-    @patch("requests.Session.get")
-    @patch("requests.Session.post")
-    def test_get_usage_data_wrong_url(self, mock_post, mock_get):
+    @patch("asyncio.sleep", new_callable=AsyncMock)
+    async def test_get_usage_data_wrong_url(self, mock_sleep):
         """Test usage data retrieval when redirected to wrong URL."""
         # Mock the usage page response
-        usage_page = Mock()
-        usage_page.content = b"""
+        usage_page = mock_session_response(b"""
         <html>
             <form>
                 <input name="token1" value="value1" />
             </form>
         </html>
-        """
-        mock_get.return_value = usage_page
+        """)
 
-        # Mock the download response (wrong URL)
-        download_response = Mock()
-        download_response.url = "https://myaccount-water.sfpuc.org/some_other_page.aspx"
-        mock_post.return_value = download_response
+        # The postback redirects somewhere other than the export
+        self.scraper.session = mock_session(
+            get=usage_page, post=mock_export_redirect("/some_other_page.aspx")
+        )
+        self.scraper._logged_in = True
 
         start_date = datetime(2023, 10, 1)
-        result = self.scraper.get_usage_data(start_date, None, "daily")
+        result = await self.scraper.get_usage_data(start_date, None, "daily")
 
         assert result is None
+        # The next poll starts over with a fresh login
+        assert self.scraper._logged_in is False
 
-    def test_get_usage_data_invalid_resolution(self):
+    async def test_get_usage_data_invalid_resolution(self):
         """Test usage data retrieval with invalid resolution."""
         start_date = datetime(2023, 10, 1)
-        result = self.scraper.get_usage_data(start_date, None, "invalid")
+        result = await self.scraper.get_usage_data(start_date, None, "invalid")
 
         assert result is None
 
-    @patch("requests.Session.get")
-    @patch("requests.Session.post")
-    def test_get_usage_data_parse_error(self, mock_post, mock_get):
+    async def test_get_usage_data_parse_error(self):
         """Test usage data retrieval with parsing errors."""
         # Mock the usage page response
-        usage_page = Mock()
-        usage_page.content = b"""
+        usage_page = mock_session_response(b"""
         <html>
             <form>
                 <input name="token1" value="value1" />
             </form>
         </html>
-        """
-        mock_get.return_value = usage_page
+        """)
 
         # Mock the download response with malformed data
-        download_response = Mock()
-        download_response.url = (
-            "https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx"
+        download_response = mock_session_response(
+            b"Date\tUsage\ninvalid_date\tinvalid_usage\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
         )
-        download_response.content = b"Date\tUsage\ninvalid_date\tinvalid_usage\n"
-        mock_post.return_value = download_response
+        self.scraper.session = mock_session(
+            get=[usage_page, download_response], post=mock_export_redirect()
+        )
+        self.scraper._logged_in = True
 
         start_date = datetime(2023, 10, 1)
-        result = self.scraper.get_usage_data(start_date, None, "daily")
+        result = await self.scraper.get_usage_data(start_date, None, "daily")
 
         # Should return empty list since parsing failed
         assert result == []
 
-    def test_get_daily_usage_legacy(self):
+    async def test_get_daily_usage_legacy(self):
         """Test the legacy get_daily_usage method."""
-        with patch.object(self.scraper, "get_usage_data") as mock_get_data:
+        # SFPUCScraper uses __slots__, so patch the method on the class
+        with patch.object(
+            SFPUCScraper, "get_usage_data", new_callable=AsyncMock
+        ) as mock_get_data:
             mock_get_data.return_value = [
                 {"timestamp": datetime(2023, 10, 1, 10, 0), "usage": 50.0},
                 {"timestamp": datetime(2023, 10, 1, 11, 0), "usage": 45.0},
             ]
 
-            result = self.scraper.get_daily_usage()
+            result = await self.scraper.get_daily_usage()
             assert result == 95.0  # Sum of hourly usage
             mock_get_data.assert_called_once()
 
-    @patch("requests.Session.get")
-    @patch("requests.Session.post")
-    def test_get_usage_data_daily_sfpuc_format_success(self, mock_post, mock_get):
+    async def test_get_usage_data_daily_sfpuc_format_success(self):
         """Test successful daily usage data retrieval with real SFPUC format (MM/DD without year)."""
         # Mock the usage page response
-        usage_page = Mock()
-        usage_page.content = b"""
+        usage_page = mock_session_response(b"""
         <html>
             <form>
                 <input name="token1" value="value1" />
             </form>
         </html>
-        """
-        mock_get.return_value = usage_page
+        """)
 
         # Mock the download response with SFPUC's actual daily format
-        download_response = Mock()
-        download_response.url = (
-            "https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx"
+        download_response = mock_session_response(
+            b"Date\tUsage\n8/11\t97\n8/12\t112\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
+        )
+        self.scraper.session = mock_session(
+            get=[usage_page, download_response], post=mock_export_redirect()
         )
-        download_response.content = b"Date\tUsage\n8/11\t97\n8/12\t112\n"
-        mock_post.return_value = download_response
+        self.scraper._logged_in = True
 
         start_date = datetime(2025, 8, 11)
         end_date = datetime(2025, 8, 12)
 
-        result = self.scraper.get_usage_data(start_date, end_date, "daily")
+        result = await self.scraper.get_usage_data(start_date, end_date, "daily")
 
         assert result is not None
         assert len(result) == 2
@@ -310,36 +548,78 @@ class TestSFPUCScraper:
         assert result[1]["timestamp"] == datetime(2025, 8, 12)
         assert result[1]["usage"] == 112
 
-    @patch("requests.Session.get")
-    @patch("requests.Session.post")
-    def test_get_usage_data_hourly_sfpuc_format_success(self, mock_post, mock_get):
+    async def test_get_usage_data_daily_spans_new_year(self):
+        """Test daily labels in a range crossing New Year get the right year."""
+        usage_page = mock_session_response(b'<input name="token1" value="value1" />')
+        download_response = mock_session_response(
+            b"Date\tUsage\n3/1\t90\n12/31\t80\n1/15\t70\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
+        )
+        self.scraper.session = mock_session(
+            get=[usage_page, download_response], post=mock_export_redirect()
+        )
+        self.scraper._logged_in = True
+
+        result = await self.scraper.get_usage_data(
+            datetime(2023, 3, 1), datetime(2024, 2, 28), "daily"
+        )
+
+        assert [item["timestamp"] for item in result] == [
+            datetime(2023, 3, 1),
+            datetime(2023, 12, 31),
+            datetime(2024, 1, 15),
+        ]
+
+    async def test_get_usage_data_daily_rows_outside_range(self):
+        """Test rows just outside the range keep their year, far ones are dropped."""
+        usage_page = mock_session_response(b'<input name="token1" value="value1" />')
+        download_response = mock_session_response(
+            b"Date\tUsage\n2/28\t95\n3/1\t90\n6/30\t70\n10/1\t60\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
+        )
+        self.scraper.session = mock_session(
+            get=[usage_page, download_response], post=mock_export_redirect()
+        )
+        self.scraper._logged_in = True
+
+        result = await self.scraper.get_usage_data(
+            datetime(2023, 3, 1), datetime(2023, 6, 30), "daily"
+        )
+
+        # 2/28 is the day before the range, not February 2024; 10/1 is months
+        # away from the range in every year and is dropped instead of misdated
+        assert [item["timestamp"] for item in result] == [
+            datetime(2023, 2, 28),
+            datetime(2023, 3, 1),
+            datetime(2023, 6, 30),
+        ]
+
+    async def test_get_usage_data_hourly_sfpuc_format_success(self):
         """Test successful hourly usage data retrieval with real SFPUC format (HH AM/PM without date)."""
         # Mock the usage page response
-        usage_page = Mock()
-        usage_page.content = b"""
+        usage_page = mock_session_response(b"""
         <html>
             <form>
                 <input name="token1" value="value1" />
                 <input name="token2" value="value2" />
             </form>
         </html>
-        """
-        mock_get.return_value = usage_page
+        """)
 
         # Mock the download response with SFPUC's actual hourly format
-        download_response = Mock()
-        download_response.url = (
-            "https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx"
+        download_response = mock_session_response(
+            b"Date\tUsage\n7 AM\t7.48\n8 AM\t14.96\n12 PM\t0\n1 PM\t0\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
         )
-        download_response.content = (
-            b"Date\tUsage\n7 AM\t7.48\n8 AM\t14.96\n12 PM\t0\n1 PM\t0\n"
+        self.scraper.session = mock_session(
+            get=[usage_page, download_response], post=mock_export_redirect()
         )
-        mock_post.return_value = download_response
+        self.scraper._logged_in = True
 
         start_date = datetime(2025, 11, 9)
         end_date = datetime(2025, 11, 9)
 
-        result = self.scraper.get_usage_data(start_date, end_date, "hourly")
+        result = await self.scraper.get_usage_data(start_date, end_date, "hourly")
 
         assert result is not None
         assert len(result) == 4
@@ -363,35 +643,31 @@ class TestSFPUCScraper:
         )
         assert result[3]["usage"] == 0
 
-    @patch("requests.Session.get")
-    @patch("requests.Session.post")
-    def test_get_usage_data_monthly_sfpuc_format_success(self, mock_post, mock_get):
+    async def test_get_usage_data_monthly_sfpuc_format_success(self):
         """Test successful monthly usage data retrieval with real SFPUC format (Mon YY)."""
         # Mock the usage page response
-        usage_page = Mock()
-        usage_page.content = b"""
+        usage_page = mock_session_response(b"""
         <html>
             <form>
                 <input name="token1" value="value1" />
             </form>
         </html>
-        """
-        mock_get.return_value = usage_page
+        """)
 
         # Mock the download response with SFPUC's actual monthly format
-        download_response = Mock()
-        download_response.url = (
-            "https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx"
+        download_response = mock_session_response(
+            b"Date\tConsumption in GALLONS\nMay 25\t2812\nJun 25\t2738\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
         )
-        download_response.content = (
-            b"Date\tConsumption in GALLONS\nMay 25\t2812\nJun 25\t2738\n"
+        self.scraper.session = mock_session(
+            get=[usage_page, download_response], post=mock_export_redirect()
         )
-        mock_post.return_value = download_response
+        self.scraper._logged_in = True
 
         start_date = datetime(2025, 5, 1)
         end_date = datetime(2025, 6, 30)
 
-        result = self.scraper.get_usage_data(start_date, end_date, "monthly")
+        result = await self.scraper.get_usage_data(start_date, end_date, "monthly")
 
         assert result is not None
         assert len(result) == 2
@@ -401,3 +677,110 @@ class TestSFPUCScraper:
         assert result[0]["resolution"] == "monthly"
         assert result[1]["timestamp"] == datetime(2025, 6, 1)
         assert result[1]["usage"] == 2738
+
+    async def test_get_usage_data_logs_in_when_needed(self):
+        """Test usage data retrieval logs in first on a fresh session."""
+        login_page = mock_session_response(
+            b'<input name="__VIEWSTATE" value="vs" />'
+            b'<input name="__EVENTVALIDATION" value="ev" />'
+        )
+        login_response = mock_session_response(
+            "Welcome", url="https://myaccount-water.sfpuc.org/MY_ACCOUNT_RSF.aspx"
+        )
+        usage_page = mock_session_response(b'<form><input name="t" value="v" /></form>')
+        download_response = mock_session_response(
+            b"Date\tUsage\n10/01\t150.5\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
+        )
+        self.scraper.session = mock_session(
+            get=[login_page, usage_page, download_response],
+            post=[login_response, mock_export_redirect()],
+        )
+
+        result = await self.scraper.get_usage_data(
+            datetime(2023, 10, 1), datetime(2023, 10, 1), "daily"
+        )
+
+        assert result is not None
+        assert len(result) == 1
+        assert self.scraper._logged_in is True
+
+        # A second fetch reuses the authenticated session and the form tokens
+        self.scraper.session.get.side_effect = None
+        self.scraper.session.get.return_value = download_response
+        self.scraper.session.post.side_effect = None
+        self.scraper.session.post.return_value = mock_export_redirect()
+        await self.scraper.get_usage_data(
+            datetime(2023, 10, 1), datetime(2023, 10, 1), "daily"
+        )
+        fetched = [c[0][0] for c in self.scraper.session.get.call_args_list]
+        assert fetched == [
+            "https://myaccount-water.sfpuc.org/",
+            "https://myaccount-water.sfpuc.org/USE_DAILY.aspx",
+            "https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
+            "https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
+        ]
+
+    @patch("asyncio.sleep", new_callable=AsyncMock)
+    async def test_get_usage_data_refreshes_rejected_tokens(self, mock_sleep):
+        """Test cached form tokens are scraped again after a rejected postback."""
+        download_response = mock_session_response(
+            b"Date\tUsage\n10/01\t150.5\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
+        )
+        self.scraper.session = mock_session(
+            get=[
+                mock_session_response(b'<input name="t" value="old" />'),
+                download_response,
+                mock_session_response(b'<input name="t" value="new" />'),
+                download_response,
+            ],
+            post=[
+                mock_export_redirect(),
+                mock_export_redirect("/ERROR.aspx"),
+                mock_export_redirect(),
+            ],
+        )
+        self.scraper._logged_in = True
+        day = datetime(2023, 10, 1)
+
+        await self.scraper.get_usage_data(day, day, "daily")
+        result = await self.scraper.get_usage_data(day, day, "daily")
+
+        assert result[0]["usage"] == 150.5
+        posted = [c[1]["data"]["t"] for c in self.scraper.session.post.call_args_list]
+        assert posted == ["old", "old", "new"]
+        assert self.scraper._form_tokens["daily"]["t"] == "new"
+
+    async def test_get_usage_data_relogin_on_expired_session(self):
+        """Test an expired session triggers a single re-login and retry."""
+        # Forms authentication sends us to the login page with a ReturnUrl
+        expired_page = mock_session_response(
+            b"<html>login</html>",
+            url="https://myaccount-water.sfpuc.org/?ReturnUrl=%2fUSE_DAILY.aspx",
+        )
+        login_page = mock_session_response(
+            b'<input name="__VIEWSTATE" value="vs" />'
+            b'<input name="__EVENTVALIDATION" value="ev" />'
+        )
+        login_response = mock_session_response(
+            "Welcome", url="https://myaccount-water.sfpuc.org/MY_ACCOUNT_RSF.aspx"
+        )
+        usage_page = mock_session_response(b'<form><input name="t" value="v" /></form>')
+        download_response = mock_session_response(
+            b"Date\tUsage\n10/01\t150.5\n",
+            url="https://myaccount-water.sfpuc.org/TRANSACTIONS_EXCEL_DOWNLOAD.aspx",
+        )
+        self.scraper.session = mock_session(
+            get=[expired_page, login_page, usage_page, download_response],
+            post=[login_response, mock_export_redirect()],
+        )
+        self.scraper._logged_in = True
+
+        result = await self.scraper.get_usage_data(
+            datetime(2023, 10, 1), datetime(2023, 10, 1), "daily"
+        )
+
+        assert result is not None
+        assert result[0]["usage"] == 150.5
+        assert self.scraper.session.post.call_count == 2
@@ -7,7 +7,7 @@ import pytest
 
 from custom_components.sfpuc.coordinator import SFWaterCoordinator
 from custom_components.sfpuc.statistics_handler import (
-    async_insert_legacy_statistics,
+    _statistic_metadata,
     async_insert_resolution_statistics,
     async_insert_statistics,
 )
@@ -115,16 +115,17 @@ class TestStatisticsHandler:
 
         # Since the function was mocked, it should not have failed with the Mock await error
 
-    @pytest.mark.asyncio
-    async def test_insert_statistics_legacy_float(self, hass, config_entry):
-        """Test inserting statistics with legacy float format."""
+    def test_statistic_metadata_is_fresh_per_call(self, hass, config_entry):
+        """Test each insertion gets its own metadata for the coordinator's ID."""
         coordinator = SFWaterCoordinator(hass, config_entry)
 
-        with patch("homeassistant.components.recorder") as mock_recorder:
-            mock_recorder.statistics.async_add_external_statistics = AsyncMock()
-            await async_insert_legacy_statistics(coordinator, 150.0)
+        first = _statistic_metadata(coordinator._stat_id)
+        first["name"] = "Changed"
+        second = _statistic_metadata(coordinator._stat_id)
 
-        # Since the function was mocked, it should not have failed with the Mock await error
+        assert second is not first
+        assert second["name"] == "San Francisco Water Power Sewer"
+        assert second["statistic_id"] == coordinator._stat_id
 
     @pytest.mark.asyncio
     async def test_insert_statistics_empty_data(self, hass, config_entry):
@@ -161,3 +162,92 @@ class TestStatisticsHandler:
             )
 
         mock_add_stats.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_insert_resolution_statistics_skips_unchanged(
+        self, hass, config_entry
+    ):
+        """Test identical data on the next poll skips the recorder entirely."""
+        coordinator = SFWaterCoordinator(hass, config_entry)
+
+        data_points = [
+            {
+                "timestamp": datetime(2023, 10, 1, 10, 0),
+                "usage": 50.0,
+                "resolution": "hourly",
+            }
+        ]
+
+        with (
+            patch(
+                "custom_components.sfpuc.statistics_handler.get_instance"
+            ) as mock_get_instance,
+            patch(
+                "custom_components.sfpuc.statistics_handler.async_add_external_statistics"
+            ) as mock_add_stats,
+        ):
+            mock_get_instance.return_value.async_add_executor_job = AsyncMock(
+                return_value={}
+            )
+            await async_insert_resolution_statistics(coordinator, data_points, "hourly")
+            await async_insert_resolution_statistics(coordinator, data_points, "hourly")
+
+        mock_add_stats.assert_called_once()
+        mock_get_instance.return_value.async_add_executor_job.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_insert_statistics_without_recorder(self, hass, config_entry):
+        """Test no work is done for the recorder when it is not loaded."""
+        from homeassistant.components.recorder.util import DATA_INSTANCE
+
+        coordinator = SFWaterCoordinator(hass, config_entry)
+        hass.data.pop(DATA_INSTANCE, None)
+
+        with patch(
+            "custom_components.sfpuc.statistics_handler.get_instance"
+        ) as mock_get_instance:
+            await async_insert_statistics(
+                coordinator,
+                [
+                    {
+                        "timestamp": datetime(2023, 10, 1, 10, 0),
+                        "usage": 50.0,
+                        "resolution": "hourly",
+                    }
+                ],
+            )
+
+        mock_get_instance.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_insert_resolution_statistics_newer_points_skip_scan(
+        self, hass, config_entry
+    ):
+        """Test points newer than the latest statistic skip the duplicate scan."""
+        coordinator = SFWaterCoordinator(hass, config_entry)
+        stat_id = coordinator._stat_id
+
+        data_points = [
+            {
+                "timestamp": datetime(2023, 10, 1, 10, 0),
+                "usage": 50.0,
+                "resolution": "hourly",
+            }
+        ]
+
+        with (
+            patch(
+                "custom_components.sfpuc.statistics_handler.get_instance"
+            ) as mock_get_instance,
+            patch(
+                "custom_components.sfpuc.statistics_handler.async_add_external_statistics"
+            ) as mock_add_stats,
+        ):
+            mock_get_instance.return_value.async_add_executor_job = AsyncMock(
+                return_value={stat_id: [{"start": 0.0, "sum": 200.0}]}
+            )
+            await async_insert_resolution_statistics(coordinator, data_points, "hourly")
+
+        mock_get_instance.return_value.async_add_executor_job.assert_awaited_once()
+        statistic_data = mock_add_stats.call_args[0][2]
+        assert statistic_data[0]["sum"] == 250.0
@@ -2,6 +2,7 @@
 
 from datetime import datetime
 from unittest.mock import Mock, patch
+from zoneinfo import ZoneInfo
 
 import pytest
 
@@ -69,6 +70,31 @@ class TestUtils:
         assert start_date == expected_start
         assert end_date == expected_end
 
+    def test_calculate_billing_period_uses_reference_time(self, hass, config_entry):
+        """Test the billing period follows the given reference time."""
+        coordinator = SFWaterCoordinator(hass, config_entry)
+        tz = ZoneInfo("America/Los_Angeles")
+
+        start_date, end_date = calculate_billing_period(
+            coordinator, datetime(2023, 12, 31, 23, 59, tzinfo=tz)
+        )
+
+        assert start_date == datetime(2023, 12, 25, tzinfo=tz)
+        assert end_date == datetime(2024, 1, 25, tzinfo=tz)
+
+    def test_calculate_billing_period_wraps_into_previous_year(
+        self, hass, config_entry
+    ):
+        """Test an early January date starts the period in December."""
+        coordinator = SFWaterCoordinator(hass, config_entry)
+
+        start_date, end_date = calculate_billing_period(
+            coordinator, datetime(2024, 1, 3, 8, 30)
+        )
+
+        assert start_date == datetime(2023, 12, 25)
+        assert end_date == datetime(2024, 1, 25)
+
     @pytest.mark.asyncio
     async def test_detect_billing_day_already_set(self, hass, config_entry):
         """Test detecting billing day when already set."""